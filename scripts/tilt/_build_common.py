@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+Shared helpers for the Tilt build scripts.
+
+docker_build_mock_server.py, docker_build_webhook.py and
+docker_build_postgres_manager.py differ only in their image name, binary
+checks and Dockerfile; the build itself (buildx builder, registry cache,
+push) lives here so build options change in one place. build_in_container.py
+and build_all_binaries.py share run_git for their build-info probes.
+"""
+
+import hashlib
+import os
+import re
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+
+BUILDX_BUILDER = "tilt-builder"
+# Marks that the buildx builder exists, so later builds skip the check
+BUILDX_SENTINEL = Path(tempfile.gettempdir()) / f"{BUILDX_BUILDER}.created"
+
+
+def run_command(cmd, check=True):
+    """Run a command (an argv list) and return the result."""
+    result = subprocess.run(cmd, capture_output=True, text=True)
+
+    if check and result.returncode != 0:
+        print(f"❌ Error: Command failed: {' '.join(cmd)}", file=sys.stderr)
+        if result.stderr:
+            print(result.stderr, file=sys.stderr)
+        sys.exit(result.returncode)
+
+    return result
+
+
+def run_git(*args):
+    """Run `git <args>` and return (exit code, stdout); stderr is discarded.
+
+    Uses os.posix_spawnp (vfork+exec on Linux) instead of subprocess's
+    fork+exec, which avoids copying the page tables of a large parent
+    process such as Tilt.  Falls back to subprocess where unavailable.
+    """
+    argv = ["git", *args]
+    if not hasattr(os, "posix_spawnp"):
+        result = subprocess.run(argv, capture_output=True, text=True)
+        return result.returncode, result.stdout
+
+    read_fd, write_fd = os.pipe()  # non-inheritable (O_CLOEXEC)
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    try:
+        pid = os.posix_spawnp("git", argv, os.environ, file_actions=[
+            (os.POSIX_SPAWN_DUP2, write_fd, 1),
+            (os.POSIX_SPAWN_DUP2, devnull, 2),
+        ])
+    except OSError:
+        os.close(read_fd)
+        raise
+    finally:
+        os.close(write_fd)
+        os.close(devnull)
+    with os.fdopen(read_fd, "rb") as pipe:
+        output = pipe.read()
+    _, status = os.waitpid(pid, 0)
+    return os.waitstatus_to_exitcode(status), output.decode()
+
+
+def stream_command(cmd, line_handler):
+    """Run cmd, passing each output line to line_handler as it arrives.
+
+    Returns the exit code. stderr is merged into stdout so progress from
+    long builds shows up live instead of after the command finishes.
+    """
+    with subprocess.Popen(
+        cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, bufsize=1
+    ) as proc:
+        for line in proc.stdout:
+            line_handler(line)
+    return proc.returncode
+
+
+def stream_build(cmd):
+    """Run a build command, streaming its output to stderr.
+
+    Returns (exit code, output) so callers can inspect why a build failed.
+    """
+    lines = []
+
+    def handle_line(line):
+        sys.stderr.write(line)
+        lines.append(line)
+
+    return stream_command(cmd, handle_line), "".join(lines)
+
+
+def image_ref(default_image):
+    """Return the image reference to build.
+
+    Tilt provides EXPECTED_REF, the full reference it expects (registry,
+    image name and tag); manual runs fall back to IMAGE_NAME and TAG.
+    """
+    expected_ref = os.getenv("EXPECTED_REF")
+    if expected_ref:
+        return expected_ref
+    image_name = os.getenv("IMAGE_NAME", default_image)
+    tag = os.getenv("TAG", "tilt")
+    return f"{image_name}:{tag}"
+
+
+def ensure_buildx_builder():
+    """Create the shared docker-container buildx builder on first use.
+
+    Returns False when buildx is unavailable, in which case callers fall
+    back to a plain `docker build`. The sentinel is trusted without asking
+    Docker; callers that see the builder missing use reset_buildx_builder().
+    """
+    if BUILDX_SENTINEL.exists() and BUILDX_SENTINEL.read_text().strip():
+        return True
+    inspect = ["docker", "buildx", "inspect", BUILDX_BUILDER]
+    if run_command(inspect, check=False).returncode != 0:
+        # network=host lets BuildKit reach the registry on localhost:5001
+        result = run_command(
+            ["docker", "buildx", "create", "--name", BUILDX_BUILDER,
+             "--driver", "docker-container", "--driver-opt", "network=host"],
+            check=False
+        )
+        # On a cold start the custom_builds and buildx-warmup race to create
+        # the builder; losing that race still leaves a usable builder
+        if result.returncode != 0 and run_command(inspect, check=False).returncode != 0:
+            return False
+    # Record the buildx version so builds can check features without a call
+    version = run_command(["docker", "buildx", "version"], check=False)
+    BUILDX_SENTINEL.write_text(version.stdout.strip() or "unknown")
+    return True
+
+
+def reset_buildx_builder():
+    """Forget the builder sentinel, so the builder is checked and recreated on next use."""
+    BUILDX_SENTINEL.unlink(missing_ok=True)
+
+
+def is_missing_builder(output):
+    """Whether buildx output reports that the shared builder does not exist.
+
+    The sentinel can outlive the builder, e.g. after `docker buildx rm` or
+    a Docker Desktop reset.
+    """
+    return f'no builder "{BUILDX_BUILDER}" found' in output
+
+
+def is_push_failure(output):
+    """Whether a failed buildx build failed at pushing the image rather than building it."""
+    return "failed to push" in output
+
+
+def buildx_can_load_and_push():
+    """Whether buildx can --load and --push in a single build.
+
+    Multiple exporters need buildx v0.13+; older versions reject the pair,
+    so the image is loaded and then pushed separately.
+    """
+    match = re.search(r"v(\d+)\.(\d+)", BUILDX_SENTINEL.read_text())
+    return bool(match) and (int(match.group(1)), int(match.group(2))) >= (0, 13)
+
+
+def build_command(dockerfile, tagged_image, push=True):
+    """Return the image build command for dockerfile, tagged as tagged_image.
+
+    With buildx, layers are also cached in the local registry under
+    <image>:buildcache, so a pruned daemon cache or a fresh machine does not
+    force a full rebuild. Where supported (and unless push is False), the
+    image is pushed by the same build, so layer uploads overlap the build
+    instead of following it; it is still loaded into the local daemon, which
+    Tilt's custom_build expects.
+    """
+    # Plain progress avoids TTY cursor redraws in Tilt's log pane; CI only
+    # needs the result, so there the build output is dropped altogether
+    output_mode = ["--quiet"] if os.environ.get("CI") else ["--progress=plain"]
+    if not tagged_image.startswith("localhost:5001") or not ensure_buildx_builder():
+        # Reuse layers of the previously pushed image even after the local
+        # build cache has been pruned; BuildKit fetches only the layers that
+        # match, so no prior `docker pull` is needed
+        return [
+            "docker", "build",
+            *output_mode,
+            "-f", str(dockerfile),
+            "-t", tagged_image,
+            "--cache-from", tagged_image,
+            "--build-arg", "BUILDKIT_INLINE_CACHE=1",
+            ".",
+        ]
+
+    cache_ref = f"{tagged_image.rsplit(':', 1)[0]}:buildcache"
+    outputs = ["--load", "--push"] if push and buildx_can_load_and_push() else ["--load"]
+    return [
+        "docker", "buildx", "build",
+        "--builder", BUILDX_BUILDER,
+        *outputs,
+        *output_mode,
+        "-f", str(dockerfile),
+        "-t", tagged_image,
+        "--cache-from", f"type=registry,ref={cache_ref}",
+        # A failed cache export must not fail the build itself
+        "--cache-to", f"type=registry,ref={cache_ref},mode=max,image-manifest=true,ignore-error=true",
+        ".",  # Build context is root
+    ]
+
+
+def find_dockerfile(*candidates):
+    """Return the first of candidates present in dockerfiles/, or None.
+
+    One directory listing answers every candidate instead of a stat each.
+    """
+    try:
+        present = {entry.name for entry in os.scandir("dockerfiles")}
+    except FileNotFoundError:
+        return None
+    return next((Path("dockerfiles") / name for name in candidates if name in present), None)
+
+
+def inputs_digest(*paths):
+    """Return a digest of the contents of the given build input files."""
+    digest = hashlib.blake2b(digest_size=16)
+    for path in paths:
+        digest.update(str(path).encode() + b"\0")
+        with open(path, "rb") as f:
+            while chunk := f.read(1 << 20):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _build_state_path(tagged_image):
+    """Return the file recording the last build of tagged_image."""
+    name = re.sub(r"[^\w.-]", "_", tagged_image)
+    return Path(tempfile.gettempdir()) / f"tilt-build-{name}.state"
+
+
+def _local_image_id(tagged_image):
+    """Return the local daemon's image ID for tagged_image, or None."""
+    result = run_command(["docker", "image", "inspect", "--format", "{{.Id}}", tagged_image], check=False)
+    return result.stdout.strip() if result.returncode == 0 else None
+
+
+def is_build_current(tagged_image, digest):
+    """Whether tagged_image was last built from inputs with this digest.
+
+    Also requires the image recorded then to still be the local
+    tagged_image, so a pruned or retagged image is rebuilt.
+    """
+    try:
+        recorded_digest, image_id = _build_state_path(tagged_image).read_text().split()
+    except (OSError, ValueError):
+        return False
+    return recorded_digest == digest and _local_image_id(tagged_image) == image_id
+
+
+def registry_has_image(tagged_image):
+    """Whether the local registry still serves tagged_image.
+
+    Images outside localhost:5001 are never pushed by these scripts, so
+    there is nothing to check for them.
+    """
+    if not tagged_image.startswith("localhost:5001"):
+        return True
+    result = run_command(["docker", "manifest", "inspect", "--insecure", tagged_image], check=False)
+    return result.returncode == 0
+
+
+def record_build(tagged_image, digest):
+    """Remember that tagged_image was built from inputs with this digest."""
+    image_id = _local_image_id(tagged_image)
+    if image_id:
+        _build_state_path(tagged_image).write_text(f"{digest} {image_id}\n")
+
+
+def _warn(msg):
+    """Print a warning to stderr."""
+    print(msg, file=sys.stderr)
+
+
+def build_and_push(dockerfile, tagged_image, info=print, warn=_warn, inputs=()):
+    """Build dockerfile as tagged_image and make it available to the cluster.
+
+    Build output streams live on stderr, leaving stdout for the caller's
+    messages and the final image ref. Images for localhost:5001 are pushed
+    (for Kind cluster access) by the build itself where buildx supports it,
+    otherwise by a `docker push` afterwards; a failed push is only a warning.
+    When `inputs` (the files the image is built from) and the Dockerfile
+    are unchanged since the last successful build, the build is skipped.
+    Returns False if the build failed.
+    """
+    # The registry probe only runs once the cheap local checks pass; it
+    # guards against a push that never landed (e.g. registry wiped or
+    # recreated since the last build)
+    digest = inputs_digest(dockerfile, *inputs) if inputs else None
+    if digest and is_build_current(tagged_image, digest) and registry_has_image(tagged_image):
+        info(f"✅ Inputs unchanged since the last build, reusing {tagged_image}")
+        return True
+
+    # Build with BuildKit (build context is root, to access build_artifacts)
+    os.environ.setdefault("DOCKER_BUILDKIT", "1")
+    cmd = build_command(dockerfile, tagged_image)
+    returncode, output = stream_build(cmd)
+    if returncode != 0 and is_missing_builder(output):
+        info(f"🔁 buildx builder {BUILDX_BUILDER} is gone, recreating it")
+        reset_buildx_builder()
+        cmd = build_command(dockerfile, tagged_image)
+        returncode, output = stream_build(cmd)
+    if returncode != 0 and "--push" in cmd and is_push_failure(output):
+        # Only the push failed, which must not fail the build: load the image
+        # without pushing (its layers are cached, so this is quick) and leave
+        # the push to the warn-only `docker push` below
+        info("📦 Push failed during the build, loading the image without it")
+        cmd = build_command(dockerfile, tagged_image, push=False)
+        returncode, output = stream_build(cmd)
+    if returncode != 0:
+        return False
+
+    if tagged_image.startswith("localhost:5001") and "--push" not in cmd:
+        info(f"📤 Pushing image to registry: {tagged_image}")
+        # Streamed like the build, so its error is already on stderr
+        if stream_command(["docker", "push", tagged_image], sys.stderr.write) != 0:
+            warn("⚠️  Warning: Failed to push image to registry")
+            warn("   The image may not be accessible to the Kind cluster")
+            return True
+
+    if digest:
+        record_build(tagged_image, digest)
+    return True
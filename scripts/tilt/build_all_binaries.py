@@ -15,6 +15,8 @@ import time
 from datetime import datetime, timezone
 from pathlib import Path
 
+from _build_common import run_git
+
 
 def run_command(cmd, check=True, capture_output=True, env=None):
     """Run a command and return the result."""
@@ -38,20 +40,14 @@ def run_command(cmd, check=True, capture_output=True, env=None):
 def get_git_hash():
     """Get git hash for build info."""
     try:
-        result = subprocess.run(
-            ["git", "rev-parse", "--short", "HEAD"],
-            capture_output=True,
-            text=True,
-            check=True
-        )
-        git_hash = result.stdout.strip()
+        code, output = run_git("rev-parse", "--short", "HEAD")
+        if code != 0:
+            raise RuntimeError("git rev-parse failed")
+        git_hash = output.strip()
         
         # Check if git is dirty
-        diff_result = subprocess.run(
-            ["git", "diff", "--quiet"],
-            capture_output=True
-        )
-        dirty_suffix = "-dirty" if diff_result.returncode != 0 else ""
+        diff_code, _ = run_git("diff", "--quiet")
+        dirty_suffix = "-dirty" if diff_code != 0 else ""
         return f"{git_hash}{dirty_suffix}"
     except Exception:
         return "unknown"
@@ -19,6 +19,10 @@ Volume layout
   smc-cargo-git       (named volume)  → /root/.cargo/git
   $(pwd)/target       (bind mount)    → /workspace/target
 
+Both are mounted into a long-lived `smc-builder` container that every build
+`docker exec`s into (recreated when the image or workspace changes; removed
+by --purge-cache).
+
 Named volumes stay inside Docker's VM and are NOT accessible from the
 macOS host.  The target/ bind-mount IS accessible so dev Dockerfiles
 can COPY from it and kubectl can apply the generated CRD.
@@ -27,21 +31,25 @@ Target: x86_64-unknown-linux-musl
 ──────────────────────────────────
 We keep the musl target (static linking) for consistency with the
 existing dev Dockerfiles and copy_mock_server_binaries.py.  The musl
-toolchain is installed once inside the builder image on first run and
-cached via the named volumes.
+toolchain is baked once into a local derived image (smc-rust-builder:<id>)
+on first run and reused by every subsequent build.
 
 Usage (from repo root):
   python3 scripts/tilt/build_in_container.py [--release] [--skip-crd]
 """
 
 import argparse
+import hashlib
 import os
+import shlex
 import subprocess
 import sys
 import time
 from datetime import datetime, timezone
 from pathlib import Path
 
+from _build_common import run_git
+
 
 # ── Configuration ─────────────────────────────────────────────────────────────
 
@@ -67,6 +75,27 @@ RUST_BUILDER_IMAGE = os.environ.get(
 # Cargo target — musl for static binaries compatible with alpine-based dev images.
 CARGO_TARGET = "x86_64-unknown-linux-musl"
 
+# Local derived image with musl-tools and the musl Rust target baked in, so
+# the per-build container does not re-run apt-get/rustup.  Tagged with the
+# base image ID so a newer base image automatically produces a new tag.
+DERIVED_BUILDER_REPO = "smc-rust-builder"
+
+# Long-lived builder container that each build `docker exec`s into, so the
+# container start/teardown cost is paid once per dev session, not per build.
+BUILDER_CONTAINER = "smc-builder"
+
+# Install musl-tools and add the musl Rust target only when the image lacks
+# them (i.e. the derived image could not be baked).  Runs once per builder
+# container, not per build.  apt-get is run quietly (-qq) so it doesn't flood
+# the build log.
+BOOTSTRAP_SCRIPT = (
+    "(test -x /usr/bin/musl-gcc || "
+    "(apt-get update -qq && "
+    "apt-get install -y --no-install-recommends musl-tools -qq 2>/dev/null)) && "
+    f"(rustup target list --installed | grep -q {CARGO_TARGET} || "
+    f"rustup target add {CARGO_TARGET} 2>/dev/null)"
+)
+
 # Named volumes for the Cargo caches (survive container restarts, stay in Docker VM).
 CARGO_REGISTRY_VOLUME = "smc-cargo-registry"
 CARGO_GIT_VOLUME = "smc-cargo-git"
@@ -87,14 +116,22 @@ PACT_BINARIES = [
     "postgres-manager",
 ]
 
+CRD_NAME = "secretmanagerconfigs.secret-management.octopilot.io"
+
+# Annotation recording the hash of the generated CRD last applied to the
+# cluster.  It lives on the CRD itself, so a recreated cluster (which has
+# no annotation) always gets a fresh apply.
+CRD_HASH_ANNOTATION = "secret-management.octopilot.io/generated-hash"
+
 
 # ── Helpers ───────────────────────────────────────────────────────────────────
 
-def run(cmd: str, *, check: bool = True) -> subprocess.CompletedProcess:
-    """Run a shell command, streaming output to stdout/stderr."""
-    result = subprocess.run(cmd, shell=True, text=True)
+def run(cmd: list[str], *, check: bool = True) -> subprocess.CompletedProcess:
+    """Run a command (argv list, no shell), streaming output to stdout/stderr."""
+    result = subprocess.run(cmd, text=True)
     if check and result.returncode != 0:
-        print(f"❌ Command failed (exit {result.returncode}): {cmd}", file=sys.stderr)
+        print(f"❌ Command failed (exit {result.returncode}): {shlex.join(cmd)}",
+              file=sys.stderr)
         sys.exit(result.returncode)
     return result
 
@@ -103,12 +140,134 @@ def ensure_volumes() -> None:
     """Create named Docker volumes if they do not already exist."""
     for vol in (CARGO_REGISTRY_VOLUME, CARGO_GIT_VOLUME):
         result = subprocess.run(
-            f"docker volume inspect {vol}",
-            shell=True, capture_output=True,
+            ["docker", "volume", "inspect", vol],
+            capture_output=True,
         )
         if result.returncode != 0:
             print(f"📦 Creating Docker volume '{vol}'...")
-            run(f"docker volume create {vol}")
+            run(["docker", "volume", "create", vol])
+
+
+def start_image_pull() -> subprocess.Popen | None:
+    """Start pulling RUST_BUILDER_IMAGE in the background."""
+    try:
+        return subprocess.Popen(
+            ["docker", "pull", "--platform", "linux/amd64", RUST_BUILDER_IMAGE],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+    except OSError:
+        return None
+
+
+def wait_for_image_pull(pull_proc: subprocess.Popen | None) -> None:
+    """Block until the background pull finishes.
+
+    A failed pull is not fatal: `docker run` will retry the pull itself (or
+    use the locally cached image when offline) and report any real error.
+    """
+    if pull_proc is None:
+        return
+    if pull_proc.poll() is None:
+        print(f"⏳ Waiting for {RUST_BUILDER_IMAGE} pull to finish...")
+    if pull_proc.wait() != 0:
+        print(f"  ⚠️  Background pull of {RUST_BUILDER_IMAGE} failed — "
+              "docker run will retry", file=sys.stderr)
+
+
+def ensure_builder_image() -> str:
+    """Return a local builder image with musl-tools pre-installed.
+
+    `apt-get update` alone hits every Debian mirror (5-15 s) and named
+    volumes cannot persist /usr/bin, so the bootstrap is baked once into a
+    derived image keyed by the base image ID and reused while it exists.
+    Falls back to RUST_BUILDER_IMAGE (with the bootstrap inlined in the
+    build script) if the base image cannot be inspected.
+    """
+    inspect = subprocess.run(
+        ["docker", "image", "inspect", "--format", "{{.Id}}", RUST_BUILDER_IMAGE],
+        capture_output=True, text=True,
+    )
+    if inspect.returncode != 0:
+        return RUST_BUILDER_IMAGE
+
+    base_id = inspect.stdout.strip().split(":")[-1][:12]
+    derived = f"{DERIVED_BUILDER_REPO}:{base_id}"
+    exists = subprocess.run(
+        ["docker", "image", "inspect", derived],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    if exists.returncode == 0:
+        return derived
+
+    print(f"📦 Baking {derived} (musl-tools + {CARGO_TARGET}), one-time...")
+    dockerfile = (
+        f"FROM {RUST_BUILDER_IMAGE}\n"
+        "RUN apt-get update -qq && "
+        "apt-get install -y --no-install-recommends musl-tools -qq && "
+        "rm -rf /var/lib/apt/lists/*\n"
+        f"RUN rustup target add {CARGO_TARGET}\n"
+    )
+    result = subprocess.run(
+        ["docker", "build", "--platform", "linux/amd64", "-t", derived, "-"],
+        input=dockerfile, text=True,
+    )
+    if result.returncode != 0:
+        print(f"  ⚠️  Could not bake {derived} — bootstrapping per build instead",
+              file=sys.stderr)
+        return RUST_BUILDER_IMAGE
+    return derived
+
+
+def remove_builder_container() -> None:
+    """Force-remove the long-lived builder container (no-op if absent)."""
+    subprocess.run(
+        ["docker", "rm", "-f", BUILDER_CONTAINER],
+        capture_output=True,
+    )
+
+
+def ensure_builder_container(workspace: Path, builder_image: str) -> None:
+    """Start the long-lived builder container unless a matching one is running.
+
+    The container is recreated when the builder image or the workspace path
+    changes.  Its labels record both so a stale container is never reused.
+    """
+    result = subprocess.run(
+        [
+            "docker", "inspect", "--format",
+            '{{.State.Running}} {{.Config.Image}} '
+            '{{index .Config.Labels "smc.workspace"}}',
+            BUILDER_CONTAINER,
+        ],
+        capture_output=True, text=True,
+    )
+    if result.returncode == 0:
+        if result.stdout.strip() == f"true {builder_image} {workspace}":
+            return
+        print(f"♻️  Recreating stale builder container '{BUILDER_CONTAINER}'...")
+        remove_builder_container()
+
+    print(f"🚀 Starting builder container '{BUILDER_CONTAINER}'...")
+    run([
+        "docker", "run", "-d",
+        "--name", BUILDER_CONTAINER,
+        # Force x86_64: the target is x86_64-unknown-linux-musl.  Without this,
+        # on Apple Silicon Docker pulls the arm64 image and musl-gcc targets arm64,
+        # causing crates with x86_64 assembly (e.g. ring) to fail at compile time.
+        # On Linux x86_64 CI this is a no-op (already the native platform).
+        "--platform", "linux/amd64",
+        "--label", f"smc.workspace={workspace}",
+        "-v", f"{workspace}:/workspace",
+        "-w", "/workspace",
+        "-v", f"{CARGO_REGISTRY_VOLUME}:/root/.cargo/registry",
+        "-v", f"{CARGO_GIT_VOLUME}:/root/.cargo/git",
+        "-e", "CARGO_NET_GIT_FETCH_WITH_CLI=true",
+        builder_image,
+        "sleep", "infinity",
+    ])
+
+    run(["docker", "exec", BUILDER_CONTAINER, "sh", "-c", BOOTSTRAP_SCRIPT])
 
 
 def get_build_info() -> dict:
@@ -116,11 +275,12 @@ def get_build_info() -> dict:
     timestamp = str(int(time.time()))
     dt = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S UTC")
     try:
-        git_hash = subprocess.check_output(
-            ["git", "rev-parse", "--short", "HEAD"], text=True
-        ).strip()
-        dirty = subprocess.run(["git", "diff", "--quiet"], capture_output=True)
-        if dirty.returncode != 0:
+        code, out = run_git("rev-parse", "--short", "HEAD")
+        if code != 0:
+            raise RuntimeError("git rev-parse failed")
+        git_hash = out.strip()
+        dirty, _ = run_git("diff", "--quiet")
+        if dirty != 0:
             git_hash += "-dirty"
     except Exception:
         git_hash = "unknown"
@@ -147,12 +307,19 @@ def main() -> None:
                         ))
     args = parser.parse_args()
 
+    # Start pulling the builder image straight away.  The pull is pure
+    # network I/O with no dependency on the volume or git steps below, so
+    # it overlaps with them; on warm runs it is a ~200 ms no-op.
+    pull_proc = start_image_pull()
+
     if args.purge_cache:
+        # The builder container holds the volumes open; drop it first.
+        remove_builder_container()
         print("🗑  Purging Cargo cache volumes...")
         for vol in (CARGO_REGISTRY_VOLUME, CARGO_GIT_VOLUME):
             result = subprocess.run(
-                f"docker volume rm {vol}",
-                shell=True, capture_output=True, text=True,
+                ["docker", "volume", "rm", vol],
+                capture_output=True, text=True,
             )
             if result.returncode == 0:
                 print(f"  ✅ Removed volume '{vol}'")
@@ -173,44 +340,37 @@ def main() -> None:
     # ── Create named volumes ───────────────────────────────────────────────
     ensure_volumes()
 
-    # ── Cargo build inside Linux container ───────────────────────────────
+    # ── Wait for the background image pull ─────────────────────────────────
+    wait_for_image_pull(pull_proc)
+    builder_image = ensure_builder_image()
+
+    # ── Cargo build inside the long-lived builder container ───────────────
     # Named volumes for the Cargo cache stay inside Docker and are fast.
     # The workspace (including target/) is a bind mount so compiled
     # binaries are visible on the host.
-    profile_flag = "--release" if args.release else ""
+    ensure_builder_container(workspace, builder_image)
 
-    build_cmd = (
-        f"docker run --rm "
-        # Force x86_64: the target is x86_64-unknown-linux-musl.  Without this,
-        # on Apple Silicon Docker pulls the arm64 image and musl-gcc targets arm64,
-        # causing crates with x86_64 assembly (e.g. ring) to fail at compile time.
-        # On Linux x86_64 CI this is a no-op (already the native platform).
-        f"--platform linux/amd64 "
-        f"-v '{workspace}:/workspace' "
-        f"-w /workspace "
-        f"-v {CARGO_REGISTRY_VOLUME}:/root/.cargo/registry "
-        f"-v {CARGO_GIT_VOLUME}:/root/.cargo/git "
+    build_argv = [
+        "docker", "exec",
+        "-w", "/workspace",
         # Pass build metadata to build.rs via environment
-        f"-e BUILD_TIMESTAMP='{info['timestamp']}' "
-        f"-e BUILD_DATETIME='{info['datetime']}' "
-        f"-e BUILD_GIT_HASH='{info['git_hash']}' "
-        f"-e CARGO_NET_GIT_FETCH_WITH_CLI=true "
-        f"{RUST_BUILDER_IMAGE} "
-        f"sh -c '"
-        # Install musl-tools and add the musl Rust target.
-        # These are idempotent: if OP_RUST_BUILDER points to the octopilot base
-        # image (which pre-installs them), apt-get and rustup skip silently.
-        # With the default rust:stable-bookworm image they are installed fresh.
-        # apt-get is run quietly (-qq) so it doesn't flood the build log.
-        f"apt-get update -qq && "
-        f"apt-get install -y --no-install-recommends musl-tools -qq 2>/dev/null && "
-        f"rustup target add {CARGO_TARGET} 2>/dev/null && "
-        f"cargo build {profile_flag} --workspace --bins --target {CARGO_TARGET}"
-        f"'"
-    )
+        "-e", f"BUILD_TIMESTAMP={info['timestamp']}",
+        "-e", f"BUILD_DATETIME={info['datetime']}",
+        "-e", f"BUILD_GIT_HASH={info['git_hash']}",
+        BUILDER_CONTAINER,
+        "cargo", "build",
+        *(["--release"] if args.release else []),
+        "--workspace", "--bins", "--target", CARGO_TARGET,
+    ]
 
     print("🔨 Running cargo build inside container (Cargo cache is shared)...")
-    run(build_cmd)
+    try:
+        run(build_argv)
+    except KeyboardInterrupt:
+        # `docker exec` does not forward SIGINT to cargo; stop it by
+        # removing the container so the next build starts clean.
+        remove_builder_container()
+        raise
 
     # ── Verify outputs ─────────────────────────────────────────────────────
     all_ok = True
@@ -229,8 +389,8 @@ def main() -> None:
     print("✅ All binaries built successfully!")
 
     # ── CRD generation ─────────────────────────────────────────────────────
-    # crdgen is a Linux binary; run it inside a container so it executes on
-    # macOS without cross-running Linux ELFs.
+    # crdgen is a Linux binary; run it inside the builder container so it
+    # executes on macOS without cross-running Linux ELFs.
     if args.skip_crd:
         print("⏭  Skipping CRD generation (--skip-crd)")
         return
@@ -240,15 +400,20 @@ def main() -> None:
     crdgen_path = f"/workspace/target/{CARGO_TARGET}/{profile}/crdgen"
 
     print("📋 Generating SecretManagerConfig CRD...")
-    crd_cmd = (
-        f"docker run --rm "
-        f"--platform linux/amd64 "  # must match the build platform
-        f"-v '{workspace}:/workspace' "
-        f"-w /workspace "
-        f"{RUST_BUILDER_IMAGE} "
-        f"sh -c '{crdgen_path} > /workspace/config/crd/secretmanagerconfig.yaml'"
-    )
-    run(crd_cmd)
+    crd_argv = [
+        "docker", "exec",
+        "-w", "/workspace",
+        BUILDER_CONTAINER,
+        crdgen_path,
+    ]
+    # crdgen's stdout is written straight to the host file descriptor, so
+    # no shell is started inside the container just for the redirect.
+    with open(crd_output, "wb") as crd_file:
+        result = subprocess.run(crd_argv, stdout=crd_file)
+    if result.returncode != 0:
+        print(f"❌ Command failed (exit {result.returncode}): {shlex.join(crd_argv)}",
+              file=sys.stderr)
+        sys.exit(result.returncode)
     print(f"  ✅ CRD written to {crd_output}")
 
     # ── kubectl apply ──────────────────────────────────────────────────────
@@ -256,22 +421,38 @@ def main() -> None:
         print("⏭  Skipping kubectl apply (--skip-apply)")
         return
 
-    cluster = run(
-        "kubectl cluster-info --request-timeout=3s",
-        check=False,
+    # One request both probes the cluster and reads the hash of the CRD
+    # this script last applied; an unchanged CRD needs no apply or wait.
+    crd_hash = hashlib.sha256(crd_output.read_bytes()).hexdigest()
+    annotation_path = CRD_HASH_ANNOTATION.replace(".", "\\.")
+    applied = subprocess.run(
+        ["kubectl", "get", "crd", CRD_NAME, "--ignore-not-found",
+         "--request-timeout=3s",
+         "-o", f"jsonpath={{.metadata.annotations.{annotation_path}}}"],
+        capture_output=True, text=True,
     )
-    if cluster.returncode != 0:
+    if applied.returncode != 0:
         print("⚠️  Cluster not reachable — skipping CRD apply", file=sys.stderr)
         print(f"   Apply manually:  kubectl apply -f {crd_output}", file=sys.stderr)
         return
+    if applied.stdout.strip() == crd_hash:
+        print("✅ CRD unchanged since last apply — skipping kubectl apply")
+        return
 
-    run(f"kubectl apply -f {crd_output}")
+    # Server-side apply: the apiserver computes the diff, and the large CRD
+    # schema is not copied into a last-applied-configuration annotation
+    # (which is capped at 256KB).  --force-conflicts takes over fields still
+    # owned by earlier client-side applies.  Instances are never deleted.
+    run(["kubectl", "apply", "--server-side", "--force-conflicts",
+         "-f", str(crd_output)])
     print("✅ CRD applied to cluster")
+    run(["kubectl", "annotate", "crd", CRD_NAME, "--overwrite",
+         f"{CRD_HASH_ANNOTATION}={crd_hash}"], check=False)
 
     # Wait for CRD to be established
-    crd_name = "secretmanagerconfigs.secret-management.octopilot.io"
     wait = run(
-        f"kubectl wait --for=condition=established crd {crd_name} --timeout=60s",
+        ["kubectl", "wait", "--for=condition=established", "crd", CRD_NAME,
+         "--timeout=60s"],
         check=False,
     )
     if wait.returncode == 0:
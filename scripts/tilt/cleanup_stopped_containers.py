@@ -4,99 +4,376 @@ Comprehensive Docker cleanup to prevent overwhelming Docker.
 
 This script performs a full Docker purge routine:
 1. Removes stopped containers (particularly Tilt build containers)
-2. Prunes dangling images
-3. Prunes unused images (older than 1 hour)
-4. Prunes build cache
-5. Prunes unused volumes
-6. Prunes unused networks
+2. Removes old Tilt images (keeping the current one per service)
+3. In parallel (disjoint Docker subsystems):
+   - Cleans up old tags in the local registry
+   - Prunes dangling images
+   - Reports unused Tilt images
+   - Prunes build cache (older than 1 hour)
+   - Prunes unused volumes
+   - Prunes unused networks
+
+The dangling image and build cache prunes are skipped when the daemon's
+disk usage report shows nothing reclaimable for them.
 
 It's safe to run repeatedly as it only removes unused resources.
 
-Runs as a one-shot cleanup after controller builds complete.
+Runs as a one-shot cleanup after controller builds complete. With --daemon
+it instead follows Docker's event stream and removes containers as they
+exit, so the full sweep does not have to be re-run after every build; it
+only removes containers carrying --label, unless --all is given.
+
+All Docker operations talk to the Docker Engine API over the daemon socket
+directly rather than forking the docker CLI per call.
 """
 
+import argparse
+import functools
+import http.client
+import io
+import json
 import subprocess
 import sys
 import os
+import queue
+import re
+import socket
+import threading
+import time
+import urllib.parse
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 
-def run_command(cmd, check=False, capture_output=True):
-    """Run a command and return the result."""
-    result = subprocess.run(cmd, capture_output=capture_output, text=True)
-    if not capture_output:
-        return result
-    if result.stdout:
-        print(result.stdout, end="")
-    if result.stderr and result.returncode != 0:
-        print(result.stderr, end="", file=sys.stderr)
-    return result
+ImageRow = namedtuple("ImageRow", ["repository", "tag", "id", "created_at"])
 
+MANIFEST_V2_MEDIA_TYPE = "application/vnd.docker.distribution.manifest.v2+json"
 
-def get_stopped_containers():
-    """Get list of stopped container IDs."""
-    result = run_command(
-        ["docker", "ps", "-a", "--filter", "status=exited", "--format", "{{.ID}}"],
-        check=False
-    )
-    if result.returncode != 0:
-        return []
+DEFAULT_DOCKER_SOCKET = "/var/run/docker.sock"
+
+# Environment configuration, read once at import
+IMAGE_NAME = os.getenv("IMAGE_NAME", "localhost:5001/secret-manager-controller")
+REGISTRY_NAME = os.getenv("REGISTRY_NAME")
+REGISTRY_URL = os.getenv("REGISTRY_URL", "http://localhost:5001")
+
+# Registry container name found by the last run (see find_registry_container)
+REGISTRY_NAME_CACHE = os.path.expanduser("~/.cache/tilt-cleanup/registry_name")
+
+# CRITICAL: Infrastructure images that must NEVER be removed
+# These are used by Kind clusters, local registries, and base images.
+# Base image repositories are protected regardless of tag: the exact set
+# is an O(1) fast path, the substring scan also catches mirrored names.
+BASE_IMAGE_REPOS = frozenset({
+    "ghcr.io/octopilot/rust-builder-base-image",
+    "ghcr.io/octopilot/secret-manager-controller-base-image",
+    "ghcr.io/octopilot/pact-mock-server-base-image",
+    "octopilot/rust-builder-base-image",
+    "octopilot/secret-manager-controller-base-image",
+    "octopilot/pact-mock-server-base-image",
+})
+PROTECTED_IMAGE_PATTERNS = (
+    "kindest/node",
+    "registry:",
+    "registry/registry:",
+    *sorted(BASE_IMAGE_REPOS),
+)
+# All patterns in one alternation, so each repo is scanned once
+PROTECTED_IMAGE_RE = re.compile("|".join(map(re.escape, PROTECTED_IMAGE_PATTERNS)))
+
+# Tags Tilt gives the images it builds: "tilt" and "tilt-<content hash>"
+TILT_TAG_RE = re.compile(r"tilt(?:-\S*)?")
+
+
+class DockerAPIError(Exception):
+    """Raised when the Docker daemon cannot be reached or rejects a request."""
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTPConnection that connects to a Unix domain socket instead of TCP."""
+    
+    def __init__(self, socket_path, timeout=60):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
     
-    container_ids = [line.strip() for line in result.stdout.strip().split("\n") if line.strip()]
-    return container_ids
+    def connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.socket_path)
+        self.sock = sock
 
 
-def get_container_info(container_id):
-    """Get container name and image for a container ID."""
-    result = run_command(
-        ["docker", "inspect", "--format", "{{.Name}} {{.Config.Image}}", container_id],
-        check=False
-    )
-    if result.returncode == 0 and result.stdout:
-        return result.stdout.strip()
-    return None
+@functools.lru_cache(maxsize=None)
+def docker_endpoint():
+    """Resolve the Docker daemon endpoint as ("unix", path) or ("tcp", host:port).
+    
+    Honours DOCKER_HOST, then the default socket, then asks the active
+    docker context (Docker Desktop, colima, ...) once for its endpoint.
+    """
+    host = os.environ.get("DOCKER_HOST", "")
+    if not host:
+        if os.path.exists(DEFAULT_DOCKER_SOCKET):
+            return "unix", DEFAULT_DOCKER_SOCKET
+        result = subprocess.run(
+            ["docker", "context", "inspect", "--format", "{{.Endpoints.docker.Host}}"],
+            capture_output=True,
+            text=True
+        )
+        host = result.stdout.strip()
+    if host.startswith("unix://"):
+        return "unix", host[len("unix://"):]
+    if host.startswith("tcp://"):
+        return "tcp", host[len("tcp://"):]
+    raise DockerAPIError(f"Unsupported or unknown Docker endpoint: {host or '(none)'}")
 
 
-def cleanup_stopped_containers():
-    """Remove stopped containers."""
-    print("📦 Removing stopped containers...")
+def open_docker_connection(timeout=60):
+    """Open a new HTTP connection to the Docker daemon."""
+    kind, address = docker_endpoint()
+    if kind == "unix":
+        return _UnixHTTPConnection(address, timeout=timeout)
+    return http.client.HTTPConnection(address, timeout=timeout)
+
+
+_docker_local = threading.local()
+
+
+def docker_api(method, path, params=None, json_body=None, raw=False, timeout=60):
+    """Call the Docker Engine API and return the decoded JSON response.
     
-    stopped_containers = get_stopped_containers()
+    Each thread keeps one keep-alive connection to the daemon, so repeated
+    calls skip both the CLI startup and the connection setup. With raw=True
+    the undecoded response body is returned instead. Pass timeout=None for
+    calls that may legitimately run for long, such as prunes and removals.
+    """
+    conn = getattr(_docker_local, "conn", None)
+    if conn is None:
+        conn = _docker_local.conn = open_docker_connection()
+    conn.timeout = timeout
+    if conn.sock is not None:
+        conn.sock.settimeout(timeout)
+    if params:
+        path = f"{path}?{urllib.parse.urlencode(params)}"
+    headers = {}
+    payload = None
+    if json_body is not None:
+        headers["Content-Type"] = "application/json"
+        payload = json.dumps(json_body)
+    
+    for attempt in range(2):
+        reused = conn.sock is not None
+        try:
+            conn.request(method, path, body=payload, headers=headers)
+            response = conn.getresponse()
+            body = response.read()
+            break
+        except (BrokenPipeError, http.client.RemoteDisconnected) as e:
+            # The daemon closed the idle keep-alive connection. A broken pipe
+            # means the request was never fully written; a disconnect before
+            # the response may follow a request the daemon already acted on,
+            # so only GETs are re-sent after one
+            conn.close()
+            retryable = isinstance(e, BrokenPipeError) or method == "GET"
+            if attempt or not reused or not retryable:
+                raise DockerAPIError(f"{method} {path}: {e}") from e
+        except (OSError, http.client.HTTPException) as e:
+            # Includes timeouts: the daemon may still be acting on the
+            # request, so it is never re-sent
+            conn.close()
+            raise DockerAPIError(f"{method} {path}: {e}") from e
+    
+    if response.status >= 400:
+        try:
+            message = json.loads(body).get("message")
+        except (ValueError, AttributeError):
+            message = body.decode(errors="replace")
+        raise DockerAPIError(f"{method} {path}: {response.status} {message}")
+    if raw:
+        return body
+    return json.loads(body) if body else None
+
+
+def docker_exec(container, cmd):
+    """Run a command in a running container and return (exit_code, output).
+    
+    Equivalent to `docker exec`: create the exec instance, start it attached
+    with a TTY (so stdout and stderr arrive as one plain stream) and read
+    its exit code once the output ends.
+    """
+    exec_id = docker_api("POST", f"/containers/{container}/exec", json_body={
+        "Cmd": cmd,
+        "AttachStdout": True,
+        "AttachStderr": True,
+        "Tty": True,
+    })["Id"]
+    # Registry garbage collection can run for a while; wait for it to finish
+    output = docker_api("POST", f"/exec/{exec_id}/start", json_body={"Detach": False, "Tty": True}, raw=True, timeout=None)
+    exit_code = docker_api("GET", f"/exec/{exec_id}/json").get("ExitCode")
+    return exit_code, output.decode(errors="replace")
+
+
+def format_size(num_bytes):
+    """Format a byte count the way the docker CLI does (decimal units)."""
+    size = float(num_bytes)
+    for unit in ("B", "kB", "MB", "GB"):
+        if size < 1000:
+            return f"{size:.4g}{unit}"
+        size /= 1000
+    return f"{size:.4g}TB"
+
+
+class _ThreadLocalStream:
+    """Stream proxy that writes to a per-thread buffer when one is set.
+    
+    Lets cleanup phases running on worker threads keep using plain print()
+    while their output is collected per phase and flushed as one block.
+    """
+    
+    def __init__(self, stream):
+        self._stream = stream
+        self._local = threading.local()
+    
+    def set_buffer(self, buffer):
+        self._local.buffer = buffer
+    
+    def write(self, text):
+        buffer = getattr(self._local, "buffer", None)
+        return (buffer or self._stream).write(text)
+    
+    def flush(self):
+        self._stream.flush()
+    
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+def run_phases_in_parallel(phases):
+    """Run independent cleanup phases concurrently and return the error count.
+    
+    Each phase blocks on a Docker daemon call (the GIL is released while
+    waiting on the subprocess), so threads are sufficient. Per-phase output
+    is buffered and printed as each phase completes, keeping it readable.
+    """
+    stdout, stderr = sys.stdout, sys.stderr
+    sys.stdout, sys.stderr = _ThreadLocalStream(stdout), _ThreadLocalStream(stderr)
+    
+    def run_phase(phase):
+        out, err = io.StringIO(), io.StringIO()
+        sys.stdout.set_buffer(out)
+        sys.stderr.set_buffer(err)
+        try:
+            return phase(), out, err
+        except Exception as e:
+            name = getattr(phase, "func", phase).__name__
+            print(f"  ⚠️  {name} failed: {e}", file=err)
+            return False, out, err
+        finally:
+            sys.stdout.set_buffer(None)
+            sys.stderr.set_buffer(None)
+    
+    errors = 0
+    try:
+        with ThreadPoolExecutor(max_workers=len(phases)) as executor:
+            futures = [executor.submit(run_phase, phase) for phase in phases]
+            for future in as_completed(futures):
+                ok, out, err = future.result()
+                stdout.write(out.getvalue())
+                stderr.write(err.getvalue())
+                stdout.write("\n")
+                if not ok:
+                    errors += 1
+    finally:
+        sys.stdout, sys.stderr = stdout, stderr
+    return errors
+
+
+def _prune(kind, params=None, **filters):
+    """Prune one kind of Docker object (containers, images, build, volumes, networks).
+    
+    Prints the reclaimed space from the API's SpaceReclaimed (when the kind
+    reports one) and returns the prune report, or None if the prune failed.
+    """
+    params = dict(params or {})
+    if filters:
+        params["filters"] = json.dumps(filters)
+    try:
+        report = docker_api("POST", f"/{kind}/prune", params, timeout=None) or {}
+    except DockerAPIError as e:
+        print(f"  ⚠️  Failed to prune {kind}: {e}", file=sys.stderr)
+        return None
+    if "SpaceReclaimed" in report:
+        print(f"  Total reclaimed space: {format_size(report['SpaceReclaimed'])}")
+    return report
+
+
+def get_reclaimable_kinds():
+    """Return the set of prune kinds ("images", "build") that have something to remove.
     
-    if not stopped_containers:
-        print("  ✅ No stopped containers found")
-        return 0, 0
+    One GET /system/df (what `docker system df` shows) tells us whether any
+    dangling images or idle build cache exist, so those prunes can be
+    skipped. The report is limited to those two types: sizing every volume
+    and container would cost more than the cheap prunes it could skip.
+    Returns None when the usage report is unavailable, meaning every phase
+    should run.
+    """
+    try:
+        # Daemons older than API 1.42 ignore type and return the full report
+        usage = docker_api("GET", "/system/df", [("type", "image"), ("type", "build-cache")])
+    except DockerAPIError as e:
+        print(f"⚠️  Could not read disk usage, running every phase: {e}", file=sys.stderr)
+        return None
     
-    print(f"  📋 Found {len(stopped_containers)} stopped container(s)")
+    kinds = set()
+    if any(not i.get("RepoTags") or i["RepoTags"] == ["<none>:<none>"] for i in usage.get("Images") or []):
+        kinds.add("images")
+    if any(not b.get("InUse") for b in usage.get("BuildCache") or []):
+        kinds.add("build")
+    return kinds
+
+
+def get_stopped_containers():
+    """Get stopped containers as (full_id, name, image) tuples."""
+    try:
+        containers = docker_api("GET", "/containers/json", {
+            "all": "1",
+            "filters": json.dumps({"status": ["exited"]}),
+        })
+    except DockerAPIError as e:
+        print(f"  ⚠️  Failed to list stopped containers: {e}", file=sys.stderr)
+        return []
+    return [
+        (c["Id"], (c.get("Names") or ["/"])[0].lstrip("/"), c.get("Image", ""))
+        for c in containers or []
+    ]
+
+
+def cleanup_stopped_containers(verbose=False):
+    """Remove stopped containers.
     
-    removed_count = 0
-    failed_count = 0
+    Uses the container prune endpoint, which removes every stopped container
+    inside the daemon in one call. The per-container listing is only
+    fetched when verbose logging is requested.
+    """
+    print("📦 Removing stopped containers...")
     
-    for container_id in stopped_containers:
-        container_info = get_container_info(container_id)
-        if container_info:
-            container_name, image = container_info.split(" ", 1)
+    if verbose:
+        stopped_containers = get_stopped_containers()
+        if not stopped_containers:
+            print("  ✅ No stopped containers found")
+            return 0, 0
+        
+        print(f"  📋 Found {len(stopped_containers)} stopped container(s)")
+        for container_id, container_name, image in stopped_containers:
             # Log controller-related containers
             if "secret-manager-controller" in container_name or "secret-manager-controller" in image:
                 print(f"    Removing: {container_name} ({image[:50]}...)")
-        
-        # Remove the container
-        result = run_command(
-            ["docker", "rm", container_id],
-            check=False
-        )
-        
-        if result.returncode == 0:
-            removed_count += 1
-        else:
-            failed_count += 1
-            if container_info:
-                print(f"    ⚠️  Failed to remove: {container_info}", file=sys.stderr)
     
-    print(f"  ✅ Removed {removed_count} container(s)")
-    if failed_count > 0:
-        print(f"  ⚠️  Failed to remove {failed_count} container(s)", file=sys.stderr)
+    report = _prune("containers")
+    if report is None:
+        return 0, 1
     
-    return removed_count, failed_count
+    removed_count = len(report.get("ContainersDeleted") or [])
+    print(f"  ✅ Removed {removed_count} container(s)")
+    return removed_count, 0
 
 
 def cleanup_dangling_images():
@@ -106,19 +383,45 @@ def cleanup_dangling_images():
     Does NOT remove images that are referenced by other images (like kindest/node).
     """
     print("🖼️  Pruning dangling images (unused intermediate layers only)...")
-    # Use --filter to exclude images that might be referenced by infrastructure
-    # This is safer than plain prune, but we still need to be careful
-    result = run_command(["docker", "image", "prune", "-f"], check=False)
-    if result.stdout:
-        # Extract reclaimed space from output
-        output_lines = result.stdout.strip().split('\n')
-        for line in output_lines:
-            if 'reclaimed' in line.lower() or 'total' in line.lower():
-                print(f"  {line.strip()}")
-    return result.returncode == 0
-
-
-def cleanup_unused_images():
+    report = _prune("images", dangling=["true"])
+    if report is None:
+        return False
+    print(f"  Deleted {len(report.get('ImagesDeleted') or [])} image layer(s)")
+    return True
+
+
+def list_tilt_images():
+    """List local images with Tilt tags once, for all phases that need them.
+    
+    The daemon filters by reference, so non-Tilt images (base images, kind
+    nodes, ...) are never serialized. path.Match-style `*` stops at `/`,
+    hence one pattern per repository depth.
+    
+    Returns a list of ImageRow(repository, tag, id, created_at), one row per
+    Tilt tag; created_at is the image's Unix timestamp.
+    """
+    try:
+        summaries = docker_api("GET", "/images/json", {
+            "filters": json.dumps({
+                "reference": ["*:tilt*", "*/*:tilt*", "*/*/*:tilt*"],
+                "dangling": ["false"],
+            }),
+        })
+    except DockerAPIError as e:
+        print(f"  ⚠️  Failed to list images: {e}", file=sys.stderr)
+        return []
+    images = []
+    for summary in summaries or []:
+        short_id = summary["Id"].split(":")[-1][:12]
+        # RepoTags lists every tag of a matching image, not just the Tilt ones
+        for repo_tag in summary.get("RepoTags") or []:
+            repository, _, tag = repo_tag.rpartition(":")
+            if tag.startswith("tilt"):
+                images.append(ImageRow(repository, tag, short_id, summary.get("Created", 0)))
+    return images
+
+
+def cleanup_unused_images(images):
     """Remove unused images we build ourselves (localhost:5001/* with tilt-* tags).
     
     NOTE: We do NOT use 'docker image prune -a' as it would remove:
@@ -133,86 +436,295 @@ def cleanup_unused_images():
     print("🖼️  Pruning unused images we build (localhost:5001/* with tilt-* tags)...")
     # Only clean up images we build ourselves, not base images or dependencies
     # This prevents re-downloading images and hitting Docker rate limits
-    result = run_command(
-        ["docker", "images", "localhost:5001/*", "--format", "{{.Repository}}\t{{.Tag}}\t{{.ID}}"],
-        check=False
-    )
-    if result.returncode == 0 and result.stdout:
-        # Count images we build (tilt-* tags) that are not in use
-        # Note: We don't actually remove them here as cleanup_old_tilt_images() handles that
-        # This function is kept for compatibility but doesn't do aggressive cleanup
-        tilt_images = [line for line in result.stdout.strip().split('\n') 
-                      if line.strip() and 'tilt-' in line]
-        if tilt_images:
-            print(f"  Found {len(tilt_images)} Tilt build image(s) (handled by cleanup_old_tilt_images)")
+    # Count images we build (tilt-* tags) that are not in use
+    # Note: We don't actually remove them here as cleanup_old_tilt_images() handles that
+    # This function is kept for compatibility but doesn't do aggressive cleanup
+    tilt_images = [
+        image for image in images
+        if image.repository.startswith("localhost:5001/")
+        and "/" not in image.repository[len("localhost:5001/"):]
+        and "tilt-" in image.tag
+    ]
+    if tilt_images:
+        print(f"  Found {len(tilt_images)} Tilt build image(s) (handled by cleanup_old_tilt_images)")
     return True  # Always succeed - actual cleanup is done by cleanup_old_tilt_images()
 
 
 def cleanup_build_cache():
     """Prune build cache (keeps only last 1 hour for faster builds)."""
     print("🔨 Pruning build cache (keeping last 1 hour)...")
-    result = run_command(
-        ["docker", "builder", "prune", "-a", "-f", "--filter", "until=1h"],
-        check=False
-    )
-    if result.stdout:
-        # Extract reclaimed space from output
-        output_lines = result.stdout.strip().split('\n')
-        for line in output_lines:
-            if 'reclaimed' in line.lower() or 'total' in line.lower():
-                print(f"  {line.strip()}")
-    return result.returncode == 0
+    return _prune("build", {"all": "true"}, until=["1h"]) is not None
 
 
 def cleanup_unused_volumes():
     """Remove unused volumes."""
     print("💾 Pruning unused volumes...")
-    result = run_command(["docker", "volume", "prune", "-f"], check=False)
-    if result.stdout:
-        # Extract reclaimed space from output
-        output_lines = result.stdout.strip().split('\n')
-        for line in output_lines:
-            if 'reclaimed' in line.lower() or 'total' in line.lower():
-                print(f"  {line.strip()}")
-    return result.returncode == 0
+    return _prune("volumes") is not None
 
 
 def cleanup_unused_networks():
     """Remove unused networks."""
     print("🌐 Pruning unused networks...")
-    result = run_command(["docker", "network", "prune", "-f"], check=False)
-    if result.stdout:
-        # Extract reclaimed space from output
-        output_lines = result.stdout.strip().split('\n')
-        for line in output_lines:
-            if 'reclaimed' in line.lower() or 'total' in line.lower():
-                print(f"  {line.strip()}")
-    return result.returncode == 0
+    report = _prune("networks")
+    if report is None:
+        return False
+    print(f"  Deleted {len(report.get('NetworksDeleted') or [])} network(s)")
+    return True
 
 
 def get_running_container_images():
-    """Get set of image references (repo:tag) and image IDs currently used by running containers."""
-    result = run_command(
-        ["docker", "ps", "--format", "{{.Image}}"],
-        check=False
-    )
-    if result.returncode != 0:
+    """Get set of image references (repo:tag) and image IDs currently used by running containers.
+    
+    The container list already carries each container's resolved image ID,
+    so no per-reference image inspect is needed.
+    """
+    try:
+        containers = docker_api("GET", "/containers/json")
+    except DockerAPIError:
         return set(), set()
     
-    image_refs = [line.strip() for line in result.stdout.strip().split('\n') if line.strip()]
-    image_ids = set()
+    image_refs = {c["Image"] for c in containers or [] if c.get("Image")}
+    image_ids = {c["ImageID"] for c in containers or [] if c.get("ImageID")}
+    return image_refs, image_ids
+
+
+def open_registry_connection(registry_url):
+    """Open a keep-alive HTTP(S) connection to the registry API."""
+    parsed = urllib.parse.urlsplit(registry_url)
+    if parsed.scheme == "https":
+        return http.client.HTTPSConnection(parsed.netloc, timeout=10)
+    return http.client.HTTPConnection(parsed.netloc, timeout=10)
+
+
+def registry_request(conn, method, path, headers=None):
+    """Send a registry API request; returns (status, headers, body).
     
-    # Get image IDs for all running container images
-    for image_ref in image_refs:
-        inspect_result = run_command(
-            ["docker", "inspect", "--format", "{{.Id}}", image_ref],
-            check=False
-        )
-        if inspect_result.returncode == 0 and inspect_result.stdout:
-            image_id = inspect_result.stdout.strip()
-            image_ids.add(image_id)
+    The body is always read in full so the connection can be reused.
+    """
+    conn.request(method, path, headers=headers or {})
+    response = conn.getresponse()
+    body = response.read()
+    return response.status, response.headers, body
+
+
+def delete_registry_tags(registry_url, repo_name, tags):
+    """Delete tags by digest (HEAD then DELETE), overlapping the round trips.
+    
+    http.client connections are not thread-safe, so each worker thread
+    opens its own keep-alive connection and reuses it for its tags.
+    Returns [(tag, outcome)] in input order, where outcome is one of
+    "deleted", "no-manifest", "no-digest" or "failed".
+    """
+    local = threading.local()
+    connections = []
+    connections_lock = threading.Lock()
+    
+    def delete_tag(tag):
+        conn = getattr(local, "conn", None)
+        if conn is None:
+            conn = local.conn = open_registry_connection(registry_url)
+            with connections_lock:
+                connections.append(conn)
+        try:
+            # The v2 Accept header is required for the registry to
+            # return Docker-Content-Digest
+            status, headers, _ = registry_request(
+                conn, "HEAD", f"/v2/{repo_name}/manifests/{tag}",
+                headers={"Accept": MANIFEST_V2_MEDIA_TYPE}
+            )
+            if status != 200:
+                return tag, "no-manifest"
+            digest = headers.get("Docker-Content-Digest")
+            if not digest:
+                return tag, "no-digest"
+            status, _, _ = registry_request(conn, "DELETE", f"/v2/{repo_name}/manifests/{digest}")
+            return tag, "deleted" if status == 202 else "failed"
+        except (OSError, http.client.HTTPException):
+            # Drop the broken connection; the next tag opens a fresh one
+            conn.close()
+            local.conn = None
+            return tag, "failed"
+    
+    try:
+        with ThreadPoolExecutor(max_workers=min(16, len(tags))) as executor:
+            return list(executor.map(delete_tag, tags))
+    finally:
+        for conn in connections:
+            conn.close()
+
+
+def cleanup_registry_tags(conn, registry_url):
+    """Delete old tags of our repository through the registry API.
+    
+    Returns True when the API was usable (whether or not anything was
+    deleted), False when the caller should fall back to garbage collection.
+    """
+    status, _, body = registry_request(conn, "GET", "/v2/_catalog")
+    if status != 200 or not body:
+        return False
+    
+    try:
+        catalog = json.loads(body)
+        repositories = catalog.get("repositories", [])
+        
+        if not repositories:
+            print("  ✅ No repositories found in registry")
+            return True
+        
+        print(f"  📋 Found {len(repositories)} repository/repositories in registry")
+        
+        # For each repository, list tags and identify old ones
+        repo_name = IMAGE_NAME.split("/")[-1] if "/" in IMAGE_NAME else IMAGE_NAME.split(":")[0]
+        
+        if repo_name not in repositories:
+            print(f"  ✅ Repository '{repo_name}' not found in registry")
+            return True
+        
+        # Get tags for this repository
+        status, _, body = registry_request(conn, "GET", f"/v2/{repo_name}/tags/list")
+        if status != 200 or not body:
+            return False
+        
+        tags_data = json.loads(body)
+        tags = tags_data.get("tags") or []
+        
+        if not tags:
+            print(f"  ✅ No tags found for repository '{repo_name}'")
+            return True
+        
+        print(f"  📋 Found {len(tags)} tag(s) for repository '{repo_name}'")
+        
+        # Filter out special tags (like 'tilt' which is the current tag)
+        # Keep the 'tilt' tag and the most recent content-hash tags
+        special_tags = {"tilt", "latest"}
+        content_hash_tags = [t for t in tags if t.startswith("tilt-") and len(t) > 10]
+        
+        # Keep the 3 most recent content-hash tags (by sorting and taking last 3)
+        # Content hash tags are typically sorted chronologically
+        content_hash_tags_sorted = sorted(content_hash_tags)
+        tags_to_keep = set(special_tags)
+        if len(content_hash_tags_sorted) > 3:
+            # Keep the last 3 content-hash tags
+            tags_to_keep.update(content_hash_tags_sorted[-3:])
+        else:
+            tags_to_keep.update(content_hash_tags_sorted)
+        
+        tags_to_remove = [t for t in tags if t not in tags_to_keep]
+        
+        if not tags_to_remove:
+            print(f"  ✅ No old tags to remove (keeping {len(tags_to_keep)} tag(s))")
+            return True
+        
+        print(f"  🗑️  Removing {len(tags_to_remove)} old tag(s), keeping {len(tags_to_keep)} tag(s)")
+        
+        deleted_count = 0
+        failed_count = 0
+        
+        for tag, outcome in delete_registry_tags(registry_url, repo_name, tags_to_remove):
+            if outcome == "deleted":
+                deleted_count += 1
+                print(f"    ✅ Deleted tag: {tag}")
+                continue
+            failed_count += 1
+            if outcome == "no-manifest":
+                print(f"    ⚠️  Could not get manifest for tag: {tag}")
+            elif outcome == "no-digest":
+                print(f"    ⚠️  Could not get digest for tag: {tag}")
+            else:
+                print(f"    ⚠️  Failed to delete tag: {tag} (delete may not be enabled)")
+        
+        if deleted_count > 0:
+            print(f"  ✅ Deleted {deleted_count} tag(s) from registry")
+            print(f"  💡 Note: Run registry garbage collection to free disk space")
+        
+        if failed_count > 0:
+            print(f"  ⚠️  Failed to delete {failed_count} tag(s) (delete may not be enabled)")
+            print(f"  💡 To enable delete, restart registry with: -e REGISTRY_STORAGE_DELETE_ENABLED=true")
+        
+        return True
+    except (json.JSONDecodeError, KeyError, AttributeError) as e:
+        print(f"  ⚠️  Failed to parse registry API response: {e}")
+        print(f"  💡 Registry may not support API or may require authentication")
+        return False
+
+
+def is_container_running(name):
+    """Check whether a container with this name exists and is running."""
+    try:
+        return docker_api("GET", f"/containers/{name}/json")["State"]["Running"]
+    except DockerAPIError:
+        return False
+
+
+def find_registry_container():
+    """Return the name of the running local registry container, or None if not found.
+    
+    REGISTRY_NAME is used as given, provided that container is running.
+    Otherwise the name found by a previous run is reused from
+    REGISTRY_NAME_CACHE while that container is still running; a stale
+    entry is discarded and the container list is probed instead.
+    """
+    if REGISTRY_NAME:
+        return REGISTRY_NAME if is_container_running(REGISTRY_NAME) else None
     
-    return set(image_refs), image_ids
+    try:
+        with open(REGISTRY_NAME_CACHE) as f:
+            cached_name = f.read().strip()
+    except OSError:
+        cached_name = ""
+    if cached_name:
+        if is_container_running(cached_name):
+            return cached_name
+        try:
+            os.remove(REGISTRY_NAME_CACHE)
+        except OSError:
+            pass
+    
+    # Check if the default registry container is running (anchored, as the
+    # name filter otherwise matches substrings such as kind-registry-old),
+    # otherwise try to find any registry container
+    registry_name = None
+    for filters in ({"name": ["^/secret-manager-controller-registry$"]}, {"ancestor": ["registry:2"]}):
+        try:
+            containers = docker_api("GET", "/containers/json", {"filters": json.dumps(filters)})
+        except DockerAPIError:
+            containers = []
+        if containers:
+            registry_name = containers[0]["Names"][0].lstrip("/")
+            break
+    if not registry_name:
+        return None
+    
+    try:
+        os.makedirs(os.path.dirname(REGISTRY_NAME_CACHE), exist_ok=True)
+        with open(REGISTRY_NAME_CACHE, "w") as f:
+            f.write(registry_name)
+    except OSError:
+        pass  # Caching is best effort
+    return registry_name
+
+
+@functools.lru_cache(maxsize=None)
+def get_registry_version(registry_name):
+    """Return the registry container's image version as (major, minor), or None if unknown.
+    
+    Read from the OCI version label on the container's config.
+    """
+    try:
+        info = docker_api("GET", f"/containers/{registry_name}/json")
+    except DockerAPIError:
+        return None
+    labels = (info.get("Config") or {}).get("Labels") or {}
+    match = re.match(r"v?(\d+)\.(\d+)", labels.get("org.opencontainers.image.version", ""))
+    return (int(match[1]), int(match[2])) if match else None
+
+
+def run_registry_gc(registry_name, cmd):
+    """Run a garbage-collect command in the registry container; returns (exit_code, output)."""
+    try:
+        return docker_exec(registry_name, cmd)
+    except DockerAPIError as e:
+        return None, str(e)
 
 
 def cleanup_registry_images():
@@ -223,164 +735,41 @@ def cleanup_registry_images():
     """
     print("🗑️  Cleaning up old images from local registry...")
     
-    # Find the registry container
-    registry_name = os.getenv("REGISTRY_NAME", "secret-manager-controller-registry")
-    
-    # Check if registry container exists and is running
-    result = run_command(
-        ["docker", "ps", "--filter", f"name={registry_name}", "--format", "{{.Names}}"],
-        check=False
-    )
-    
-    if result.returncode != 0 or registry_name not in result.stdout:
-        # Try to find any registry container
-        result = run_command(
-            ["docker", "ps", "--filter", "ancestor=registry:2", "--format", "{{.Names}}"],
-            check=False
-        )
-        if result.returncode == 0 and result.stdout.strip():
-            registry_name = result.stdout.strip().split('\n')[0]
-        else:
-            print("  ⚠️  No registry container found, skipping registry cleanup")
-            return True
+    registry_name = find_registry_container()
+    if not registry_name:
+        print("  ⚠️  No registry container found, skipping registry cleanup")
+        return True
     
     print(f"  📦 Using registry container: {registry_name}")
     
     # Method 1: Use registry garbage collection API (if available)
     # This requires the registry to have delete enabled
-    registry_url = os.getenv("REGISTRY_URL", "http://localhost:5001")
-    
-    # Try to get catalog first to see if API is accessible
-    catalog_result = run_command(
-        ["curl", "-s", f"{registry_url}/v2/_catalog"],
-        check=False
-    )
+    # Registry API calls reuse keep-alive connections instead of forking
+    # curl (and opening a new TCP connection) per request
+    conn = open_registry_connection(REGISTRY_URL)
+    try:
+        if cleanup_registry_tags(conn, REGISTRY_URL):
+            return True
+    except (OSError, http.client.HTTPException) as e:
+        print(f"  ⚠️  Registry API not reachable at {REGISTRY_URL}: {e}")
+    finally:
+        conn.close()
     
-    if catalog_result.returncode == 0 and catalog_result.stdout:
-        try:
-            import json
-            catalog = json.loads(catalog_result.stdout)
-            repositories = catalog.get("repositories", [])
-            
-            if not repositories:
-                print("  ✅ No repositories found in registry")
-                return True
-            
-            print(f"  📋 Found {len(repositories)} repository/repositories in registry")
-            
-            # For each repository, list tags and identify old ones
-            image_name = os.getenv("IMAGE_NAME", "localhost:5001/secret-manager-controller")
-            repo_name = image_name.split("/")[-1] if "/" in image_name else image_name.split(":")[0]
-            
-            if repo_name not in repositories:
-                print(f"  ✅ Repository '{repo_name}' not found in registry")
-                return True
-            
-            # Get tags for this repository
-            tags_result = run_command(
-                ["curl", "-s", f"{registry_url}/v2/{repo_name}/tags/list"],
-                check=False
-            )
-            
-            if tags_result.returncode == 0 and tags_result.stdout:
-                tags_data = json.loads(tags_result.stdout)
-                tags = tags_data.get("tags", [])
-                
-                if not tags:
-                    print(f"  ✅ No tags found for repository '{repo_name}'")
-                    return True
-                
-                print(f"  📋 Found {len(tags)} tag(s) for repository '{repo_name}'")
-                
-                # Filter out special tags (like 'tilt' which is the current tag)
-                # Keep the 'tilt' tag and the most recent content-hash tags
-                special_tags = {"tilt", "latest"}
-                content_hash_tags = [t for t in tags if t.startswith("tilt-") and len(t) > 10]
-                other_tags = [t for t in tags if t not in special_tags and not t.startswith("tilt-")]
-                
-                # Keep the 3 most recent content-hash tags (by sorting and taking last 3)
-                # Content hash tags are typically sorted chronologically
-                content_hash_tags_sorted = sorted(content_hash_tags)
-                tags_to_keep = set(special_tags)
-                if len(content_hash_tags_sorted) > 3:
-                    # Keep the last 3 content-hash tags
-                    tags_to_keep.update(content_hash_tags_sorted[-3:])
-                else:
-                    tags_to_keep.update(content_hash_tags_sorted)
-                
-                tags_to_remove = [t for t in tags if t not in tags_to_keep]
-                
-                if not tags_to_remove:
-                    print(f"  ✅ No old tags to remove (keeping {len(tags_to_keep)} tag(s))")
-                    return True
-                
-                print(f"  🗑️  Removing {len(tags_to_remove)} old tag(s), keeping {len(tags_to_keep)} tag(s)")
-                
-                # Check if delete is enabled by trying to get a manifest
-                # If we can get manifests, we can potentially delete them
-                deleted_count = 0
-                failed_count = 0
-                
-                for tag in tags_to_remove:
-                    # Get manifest digest for this tag
-                    manifest_result = run_command(
-                        ["curl", "-s", "-I", f"{registry_url}/v2/{repo_name}/manifests/{tag}"],
-                        check=False
-                    )
-                    
-                    if manifest_result.returncode == 0:
-                        # Extract digest from Docker-Content-Digest header
-                        digest = None
-                        for line in manifest_result.stdout.split('\n'):
-                            if line.startswith("Docker-Content-Digest:"):
-                                digest = line.split(":", 1)[1].strip()
-                                break
-                        
-                        if digest:
-                            # Delete manifest by digest
-                            delete_result = run_command(
-                                ["curl", "-s", "-X", "DELETE", f"{registry_url}/v2/{repo_name}/manifests/{digest}"],
-                                check=False
-                            )
-                            
-                            if delete_result.returncode == 0:
-                                deleted_count += 1
-                                print(f"    ✅ Deleted tag: {tag}")
-                            else:
-                                failed_count += 1
-                                print(f"    ⚠️  Failed to delete tag: {tag} (delete may not be enabled)")
-                        else:
-                            failed_count += 1
-                            print(f"    ⚠️  Could not get digest for tag: {tag}")
-                    else:
-                        failed_count += 1
-                        print(f"    ⚠️  Could not get manifest for tag: {tag}")
-                
-                if deleted_count > 0:
-                    print(f"  ✅ Deleted {deleted_count} tag(s) from registry")
-                    print(f"  💡 Note: Run registry garbage collection to free disk space")
-                    print(f"  💡 To enable delete, set REGISTRY_STORAGE_DELETE_ENABLED=true in registry container")
-                
-                if failed_count > 0:
-                    print(f"  ⚠️  Failed to delete {failed_count} tag(s) (delete may not be enabled)")
-                    print(f"  💡 To enable delete, restart registry with: -e REGISTRY_STORAGE_DELETE_ENABLED=true")
-                
-                return True
-        except (json.JSONDecodeError, KeyError) as e:
-            print(f"  ⚠️  Failed to parse registry API response: {e}")
-            print(f"  💡 Registry may not support API or may require authentication")
-    
-    # Method 2: Use registry garbage collection command (requires registry:2.5+)
+    # Method 2: Use registry garbage collection command
     # This removes unused blobs but doesn't delete manifests unless delete is enabled
     print(f"  🔄 Running registry garbage collection...")
-    gc_result = run_command(
-        ["docker", "exec", registry_name, "registry", "garbage-collect", "/etc/docker/registry/config.yml", "--delete-untagged"],
-        check=False
-    )
+    # --delete-untagged arrived in registry 2.7. When the version is known,
+    # run only the command that applies instead of trying the modern one first.
+    version = get_registry_version(registry_name)
+    exit_code = None
+    if version is None or version >= (2, 7):
+        exit_code, output = run_registry_gc(
+            registry_name,
+            ["registry", "garbage-collect", "/etc/docker/registry/config.yml", "--delete-untagged"]
+        )
     
-    if gc_result.returncode == 0:
+    if exit_code == 0:
         # Parse output to see if anything was deleted
-        output = gc_result.stdout if gc_result.stdout else ""
         deleted_blobs = [line for line in output.split('\n') if 'deleting blob' in line.lower() or 'deleted' in line.lower()]
         
         if deleted_blobs:
@@ -392,11 +781,12 @@ def cleanup_registry_images():
             print(f"  💡 To delete old tags, enable delete: docker stop {registry_name} && docker rm {registry_name} && docker run -d --restart=always -p 127.0.0.1:5000:5000 -e REGISTRY_STORAGE_DELETE_ENABLED=true --name {registry_name} registry:2")
     else:
         # Try alternative garbage collection command (older registry versions)
-        gc_result = run_command(
-            ["docker", "exec", registry_name, "/bin/registry", "garbage-collect", "/etc/docker/registry/config.yml"],
-            check=False
-        )
-        if gc_result.returncode == 0:
+        if version is None or version < (2, 7):
+            exit_code, output = run_registry_gc(
+                registry_name,
+                ["/bin/registry", "garbage-collect", "/etc/docker/registry/config.yml"]
+            )
+        if exit_code == 0:
             print(f"  ✅ Registry garbage collection completed (legacy mode)")
         else:
             print(f"  ⚠️  Registry garbage collection not available (registry may be too old or command not found)")
@@ -405,9 +795,26 @@ def cleanup_registry_images():
     return True
 
 
-def cleanup_old_tilt_images():
+def remove_image_ref(repo_tag):
+    """Remove a single image reference; returns True on success.
+    
+    noprune leaves untagged parent layers in place instead of garbage
+    collecting them per removal; the dangling-image prune that follows
+    removals in main() collects them all in one pass.
+    """
+    try:
+        docker_api("DELETE", f"/images/{repo_tag}", params={"noprune": "1"}, timeout=None)
+        return True
+    except DockerAPIError:
+        return False
+
+
+def cleanup_old_tilt_images(images):
     """Remove old Tilt images, keeping only the current running image per service.
     
+    `images` is the list from list_tilt_images(); references removed here are
+    dropped from it in place so later phases see the current state.
+    
     For Tilt deployments in dev environment, we only need the current running image.
     No rollback capability needed in dev, so we keep only 1 image per service.
     
@@ -415,155 +822,220 @@ def cleanup_old_tilt_images():
     """
     print("🏷️  Removing old Tilt images (keeping current running image per service)...")
     
-    # CRITICAL: List of infrastructure images that must NEVER be removed
-    # These are used by Kind clusters, local registries, and base images
-    protected_images = {
-        "kindest/node",
-        "registry:",
-        "registry/registry:",
-        "ghcr.io/octopilot/rust-builder-base-image",
-        "ghcr.io/octopilot/secret-manager-controller-base-image",
-        "ghcr.io/octopilot/pact-mock-server-base-image",
-        "octopilot/rust-builder-base-image",
-        "octopilot/secret-manager-controller-base-image",
-        "octopilot/pact-mock-server-base-image",
-    }
-    
-    # Get all images with tilt-* tags (all Tilt services)
-    # Group by repository and keep only the most recent (current running) per repository
-    result = run_command(
-        ["docker", "images", "--format", "{{.Repository}}\t{{.Tag}}\t{{.ID}}\t{{.CreatedAt}}"],
-        check=False
-    )
-    
-    if result.returncode != 0 or not result.stdout:
-        print("  ✅ No images found")
+    if not images:
+        print("  ✅ No Tilt images found")
         return True
     
-    # Group images by repository, filtering for tilt-* tags
+    # Group images by repository, filtering for tilt-* tags (all Tilt services)
+    # and keep only the most recent (current running) per repository
     repos = {}
-    for line in result.stdout.strip().split('\n'):
-        if not line.strip():
-            continue
-        parts = line.strip().split('\t')
-        if len(parts) >= 4:
-            repo = parts[0]
-            tag = parts[1]
-            img_id = parts[2]
-            created = parts[3]
-            
-            # Only process tilt-* tags (Tilt builds)
-            if tag.startswith("tilt-") or tag == "tilt":
-                if repo not in repos:
-                    repos[repo] = []
-                repos[repo].append((created, img_id, tag))
+    for repo, tag, img_id, created in images:
+        # Only process tilt-* tags (Tilt builds)
+        if TILT_TAG_RE.fullmatch(tag):
+            if repo not in repos:
+                repos[repo] = []
+            repos[repo].append((created, img_id, tag))
     
     if not repos:
         print("  ✅ No Tilt images found")
         return True
     
-    removed_count = 0
     kept_count = 0
+    to_remove = []
     
     # For each repository, keep only the most recent (current running) image
-    for repo, images in repos.items():
+    for repo, repo_images in repos.items():
         repo_tag_prefix = f"{repo}:"
         
         # CRITICAL: Never remove infrastructure images or base images
-        is_protected = False
-        for protected_pattern in protected_images:
-            if protected_pattern in repo_tag_prefix:
-                is_protected = True
-                print(f"    🔒 Protected (infrastructure/base image): {repo}")
-                break
-        
-        # Also protect base images by repository name (regardless of tag)
-        base_image_repos = [
-            "ghcr.io/octopilot/rust-builder-base-image",
-            "ghcr.io/octopilot/secret-manager-controller-base-image",
-            "ghcr.io/octopilot/pact-mock-server-base-image",
-            "octopilot/rust-builder-base-image",
-            "octopilot/secret-manager-controller-base-image",
-            "octopilot/pact-mock-server-base-image",
-        ]
-        if repo in base_image_repos:
-            is_protected = True
-            print(f"    🔒 Protected (base image): {repo}")
-        
+        is_protected = repo in BASE_IMAGE_REPOS or PROTECTED_IMAGE_RE.search(repo_tag_prefix)
         if is_protected:
-            kept_count += len(images)
+            print(f"    🔒 Protected (infrastructure/base image): {repo}")
+            kept_count += len(repo_images)
             continue
         
         # Sort by creation date (newest first)
-        images.sort(key=lambda x: x[0], reverse=True)
+        repo_images.sort(key=lambda x: x[0], reverse=True)
         
         # Keep only the most recent (current running), remove the rest
-        if len(images) > 1:
-            for created, img_id, tag in images[1:]:  # Skip first 1 (most recent/current)
-                repo_tag = f"{repo}:{tag}"
+        if len(repo_images) > 1:
+            for created, img_id, tag in repo_images[1:]:  # Skip first 1 (most recent/current)
                 # CRITICAL: Remove by repository:tag, NOT by image ID
                 # Removing by ID can delete shared layers used by other images (like kindest/node)
-                remove_result = run_command(["docker", "rmi", repo_tag], check=False)
-                if remove_result.returncode == 0:
-                    removed_count += 1
+                to_remove.append(f"{repo}:{tag}")
+            kept_count += 1
+        else:
+            kept_count += len(repo_images)
+    
+    # Per-call latency dominates and the daemon handles concurrent rmi fine
+    removed_refs = set()
+    if to_remove:
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = executor.map(remove_image_ref, to_remove)
+            for repo_tag, ok in zip(to_remove, results):
+                if ok:
+                    removed_refs.add(repo_tag)
                     print(f"    Removed (old): {repo_tag}")
                 else:
                     print(f"    ⚠️  Failed to remove: {repo_tag}", file=sys.stderr)
-            kept_count += 1
-        else:
-            kept_count += len(images)
+    removed_count = len(removed_refs)
+    images[:] = [image for image in images
+                 if f"{image.repository}:{image.tag}" not in removed_refs]
     
     print(f"  ✅ Removed {removed_count} old Tilt image(s), kept {kept_count} image(s) (current running per service)")
     return True
 
 
+def follow_container_deaths(label, events):
+    """Stream container "die" events from the daemon into the events queue.
+    
+    Puts (container_id, name) tuples, then None when the stream ends, or the
+    exception that ended it.
+    """
+    filters = {"type": ["container"], "event": ["die"]}
+    if label:
+        filters["label"] = [label]
+    try:
+        # No timeout: the stream stays idle until a container exits
+        conn = open_docker_connection(timeout=None)
+        conn.request("GET", f"/events?{urllib.parse.urlencode({'filters': json.dumps(filters)})}")
+        response = conn.getresponse()
+        if response.status >= 400:
+            raise DockerAPIError(f"GET /events: {response.status} {response.read().decode(errors='replace')}")
+        for line in response:
+            if not line.strip():
+                continue
+            actor = json.loads(line).get("Actor", {})
+            events.put((actor.get("ID"), actor.get("Attributes", {}).get("name", "")))
+        events.put(None)
+    except Exception as e:
+        events.put(e)
+
+
+def remove_containers(pending):
+    """Remove the given {container_id: name} containers, returning the count removed."""
+    removed = 0
+    for container_id, name in pending.items():
+        try:
+            docker_api("DELETE", f"/containers/{container_id}", timeout=None)
+            removed += 1
+        except DockerAPIError as e:
+            # Already gone (404) or restarted by its restart policy (409)
+            print(f"  ⚠️  Could not remove {name or container_id[:12]}: {e}", file=sys.stderr)
+    return removed
+
+
+def watch_stopped_containers(label=None, flush_interval=2.0):
+    """Remove containers as they exit, driven by Docker events.
+    
+    Rather than re-enumerating every container after each build, exited
+    containers are collected from the event stream and removed in batches
+    once flush_interval seconds have passed since the first one arrived.
+    """
+    print("👀 Watching for exited containers" + (f" with label {label}" if label else "") + " (Ctrl+C to stop)...")
+    events = queue.Queue()
+    threading.Thread(target=follow_container_deaths, args=(label, events), daemon=True).start()
+    
+    pending = {}
+    deadline = None
+    while True:
+        timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+        try:
+            event = events.get(timeout=timeout)
+        except queue.Empty:
+            removed = remove_containers(pending)
+            print(f"  ✅ Removed {removed} exited container(s)")
+            pending.clear()
+            deadline = None
+            continue
+        
+        if event is None or isinstance(event, Exception):
+            remove_containers(pending)
+            reason = event or "event stream closed"
+            print(f"  ❌ Stopped watching Docker events: {reason}", file=sys.stderr)
+            return 1
+        
+        container_id, name = event
+        pending[container_id] = name
+        if deadline is None:
+            deadline = time.monotonic() + flush_interval
+
+
 def main():
     """Main cleanup function - full purge routine."""
-    print("🧹 Starting comprehensive Docker cleanup...")
-    print("")
+    parser = argparse.ArgumentParser(description="Comprehensive Docker cleanup for Tilt development")
+    parser.add_argument("--verbose", action="store_true",
+                        help="List stopped containers (and log controller ones) before pruning them")
+    parser.add_argument("--daemon", action="store_true",
+                        help="Keep running and remove containers as they exit instead of a one-shot purge")
+    parser.add_argument("--label",
+                        help="With --daemon, only remove containers carrying this label (e.g. tilt.build)")
+    parser.add_argument("--all", action="store_true",
+                        help="With --daemon, remove every container on the host as it exits")
+    args = parser.parse_args()
     
-    total_errors = 0
+    # Without a label the daemon would also remove the user's own containers
+    # (including exited ones kept for debugging), so that takes --all
+    if args.daemon and not args.label and not args.all:
+        parser.error("--daemon requires --label, or --all to remove every exited container")
     
-    # 1. Remove stopped containers
-    removed, failed = cleanup_stopped_containers()
-    if failed > 0:
-        total_errors += failed
-    print("")
+    if args.daemon:
+        try:
+            return watch_stopped_containers(label=args.label)
+        except KeyboardInterrupt:
+            print("")
+            print("👋 Stopped watching")
+            return 0
     
-    # 2. Prune dangling images
-    if not cleanup_dangling_images():
-        total_errors += 1
+    print("🧹 Starting comprehensive Docker cleanup...")
     print("")
     
-    # 3. Prune unused images
-    if not cleanup_unused_images():
-        total_errors += 1
-    print("")
+    total_errors = 0
     
-    # 4. Prune build cache
-    if not cleanup_build_cache():
-        total_errors += 1
-    print("")
+    # Skip the image and build cache prunes when they have nothing to
+    # reclaim; the other prunes are cheap and always run
+    reclaimable = get_reclaimable_kinds()
     
-    # 5. Clean up registry images
-    if not cleanup_registry_images():
-        total_errors += 1
-    print("")
+    def has_work(kind):
+        return reclaimable is None or kind in reclaimable
     
-    # 6. Remove old Tilt images
-    if not cleanup_old_tilt_images():
-        total_errors += 1
+    # 1. Remove stopped containers
+    removed, failed = cleanup_stopped_containers(verbose=args.verbose)
+    if failed > 0:
+        total_errors += failed
     print("")
     
-    # 7. Prune unused volumes
-    if not cleanup_unused_volumes():
+    # 2. Remove old Tilt images
+    # Runs before the image prune below so the prune also sweeps any layers
+    # these removals leave dangling.
+    images = list_tilt_images()
+    image_count = len(images)
+    if not cleanup_old_tilt_images(images):
         total_errors += 1
     print("")
     
-    # 8. Prune unused networks
-    if not cleanup_unused_networks():
-        total_errors += 1
-    print("")
+    # 3. Clean up registry images, prune dangling images, build cache, volumes
+    # and networks in parallel (they touch disjoint Docker subsystems)
+    phases = [
+        cleanup_registry_images,
+        functools.partial(cleanup_unused_images, images),
+        cleanup_unused_volumes,
+        cleanup_unused_networks,
+    ]
+    skipped = []
+    for needed, phase in (
+        # Removing old Tilt images can leave layers dangling
+        (has_work("images") or len(images) < image_count, cleanup_dangling_images),
+        (has_work("build"), cleanup_build_cache),
+    ):
+        if needed:
+            phases.append(phase)
+        else:
+            skipped.append(phase.__name__)
+    if skipped:
+        print(f"⏭️  Nothing to reclaim, skipping: {', '.join(skipped)}")
+        print("")
+    total_errors += run_phases_in_parallel(phases)
     
     print("✅ Comprehensive cleanup complete!")
     if total_errors > 0:
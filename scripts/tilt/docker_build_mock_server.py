@@ -7,88 +7,43 @@ Similar to docker_build.py but for the mock server.
 """
 
 import os
-import subprocess
 import sys
-from pathlib import Path
 
-
-def run_command(cmd, check=True, shell=False):
-    """Run a command and return the result."""
-    if isinstance(cmd, str) and not shell:
-        cmd = cmd.split()
-    
-    result = subprocess.run(cmd, shell=shell, capture_output=True, text=True)
-    
-    if check and result.returncode != 0:
-        print(f"❌ Error: Command failed: {' '.join(cmd) if isinstance(cmd, list) else cmd}", file=sys.stderr)
-        if result.stderr:
-            print(result.stderr, file=sys.stderr)
-        sys.exit(result.returncode)
-    
-    return result
+from _build_common import build_and_push, find_dockerfile, image_ref
 
 
 def main():
     """Main build function."""
-    # Tilt provides EXPECTED_REF which is the full image reference it expects
-    # This includes the registry, image name, and tag
-    expected_ref = os.getenv("EXPECTED_REF")
-    if not expected_ref:
-        # Fallback for manual execution
-        image_name = os.getenv("IMAGE_NAME", "localhost:5001/pact-mock-server")
-        tag = os.getenv("TAG", "tilt")
-        expected_ref = f"{image_name}:{tag}"
-    
-    tagged_image = expected_ref
-    
-    # Verify binaries exist
-    binary_paths = [
-        Path("build_artifacts/mock-server/gcp-mock-server"),
-        Path("build_artifacts/mock-server/aws-mock-server"),
-        Path("build_artifacts/mock-server/azure-mock-server"),
-        Path("build_artifacts/mock-server/webhook"),
-        Path("build_artifacts/mock-server/manager"),
-    ]
-    
-    for binary_path in binary_paths:
-        if not binary_path.exists():
-            print(f"❌ Error: Binary not found: {binary_path}", file=sys.stderr)
-            print("   Please run the build resources first", file=sys.stderr)
-            sys.exit(1)
+    # Tilt provides EXPECTED_REF; IMAGE_NAME/TAG are the manual fallback
+    tagged_image = image_ref("localhost:5001/pact-mock-server")
+    
+    # Verify binaries exist (one directory listing, reporting every missing one)
+    artifact_dir = "build_artifacts/mock-server"
+    required = ["gcp-mock-server", "aws-mock-server", "azure-mock-server", "webhook", "manager"]
+    try:
+        present = {entry.name for entry in os.scandir(artifact_dir)}
+    except FileNotFoundError:
+        present = set()
+    missing = [name for name in required if name not in present]
+    if missing:
+        for name in missing:
+            print(f"❌ Error: Binary not found: {artifact_dir}/{name}", file=sys.stderr)
+        print("   Please run the build resources first", file=sys.stderr)
+        sys.exit(1)
     
-    dockerfile = Path("dockerfiles/Dockerfile.pact-mock-server")
-    if not dockerfile.exists():
-        print(f"❌ Error: Dockerfile not found: {dockerfile}", file=sys.stderr)
+    dockerfile = find_dockerfile("Dockerfile.pact-mock-server")
+    if dockerfile is None:
+        print("❌ Error: Dockerfile not found: dockerfiles/Dockerfile.pact-mock-server", file=sys.stderr)
         sys.exit(1)
     
     # Build Docker image
     print(f"🐳 Building Docker image: {tagged_image}")
     
-    # Use docker build with build context as root (to access build_artifacts)
-    cmd = [
-        "docker", "build",
-        "-f", str(dockerfile),
-        "-t", tagged_image,
-        ".",  # Build context is root
-    ]
-    
-    result = run_command(cmd, check=False)
-    if result.returncode != 0:
+    binaries = [f"{artifact_dir}/{name}" for name in required]
+    if not build_and_push(dockerfile, tagged_image, inputs=binaries):
         print("❌ Error: Docker build failed", file=sys.stderr)
-        if result.stdout:
-            print(result.stdout, file=sys.stderr)
-        if result.stderr:
-            print(result.stderr, file=sys.stderr)
         sys.exit(1)
     
-    # Push to registry (for Kind cluster access)
-    if tagged_image.startswith("localhost:5001"):
-        print(f"📤 Pushing image to registry: {tagged_image}")
-        push_result = run_command(["docker", "push", tagged_image], check=False)
-        if push_result.returncode != 0:
-            print("⚠️  Warning: Failed to push image to registry", file=sys.stderr)
-            print("   The image may not be accessible to the Kind cluster", file=sys.stderr)
-    
     print(f"✅ Docker image built and pushed successfully: {tagged_image}")
     
     # CRITICAL: Output the image reference to stdout for Tilt's custom_build
@@ -11,19 +11,25 @@ the controller clones repos itself.
 import os
 import subprocess
 import sys
-import time
+
+
+# CRDs the secret-manager-controller needs from ArgoCD
+ARGOCD_CRDS = [
+    "applications.argoproj.io",
+    "applicationsets.argoproj.io",
+    "appprojects.argoproj.io",
+]
 
 
 def run_command(cmd, check=True, capture_output=True):
-    """Run a shell command and return the result."""
+    """Run a command (an argv list) and return the result."""
     result = subprocess.run(
         cmd,
-        shell=True,
         capture_output=capture_output,
         text=True
     )
     if check and result.returncode != 0:
-        print(f"Error: Command failed: {cmd}", file=sys.stderr)
+        print(f"Error: Command failed: {' '.join(cmd)}", file=sys.stderr)
         if result.stderr:
             print(result.stderr, file=sys.stderr)
         sys.exit(1)
@@ -47,26 +53,17 @@ def log_error(msg):
 
 def check_argocd_installed():
     """Check if ArgoCD CRDs are already installed in the cluster."""
-    # Check if all required CRDs exist
-    required_crds = [
-        "applications.argoproj.io",
-        "applicationsets.argoproj.io",
-        "appprojects.argoproj.io"
-    ]
+    # Check all required CRDs with one kubectl call; missing ones are
+    # simply absent from the output
+    result = run_command(
+        ["kubectl", "get", "crd", *ARGOCD_CRDS, "-o", "name", "--ignore-not-found"],
+        check=False,
+        capture_output=True
+    )
+    found = set(result.stdout.split())
+    expected = {f"customresourcedefinition.apiextensions.k8s.io/{crd}" for crd in ARGOCD_CRDS}
     
-    all_installed = True
-    for crd in required_crds:
-        crd_result = run_command(
-            f"kubectl get crd {crd}",
-            check=False,
-            capture_output=True
-        )
-        
-        if crd_result.returncode != 0:
-            all_installed = False
-            break
-    
-    if all_installed:
+    if result.returncode == 0 and found >= expected:
         log_info("✅ ArgoCD CRDs are already installed")
         return True
     
@@ -89,116 +86,61 @@ def install_argocd():
     project_root = os.path.dirname(os.path.dirname(script_dir))
     crd_dir = os.path.join(project_root, "pact-broker", "argocd")
     
-    if not os.path.exists(crd_dir):
+    # One directory listing answers every existence check below
+    try:
+        present = {entry.name for entry in os.scandir(crd_dir)}
+    except FileNotFoundError:
         log_error(f"CRD directory not found: {crd_dir}")
         log_error("Please ensure pact-broker/argocd directory exists with CRD files")
         return False
     
-    if not os.path.exists(os.path.join(crd_dir, "kustomization.yaml")):
+    if "kustomization.yaml" not in present:
         log_error(f"kustomization.yaml not found in {crd_dir}")
         return False
     
     log_info(f"📦 Applying CRDs from: {crd_dir}")
     
-    # Apply CRDs individually (more reliable than kustomize for large CRDs)
+    # Apply the CRD files directly (more reliable than kustomize for large CRDs)
     crd_files = [
         "applications.argoproj.io.yaml",
         "applicationsets.argoproj.io.yaml",
         "appprojects.argoproj.io.yaml"
     ]
     
-    all_applied = True
+    apply_cmd = ["kubectl", "apply", "--server-side", "--force-conflicts"]
     for crd_file in crd_files:
         crd_path = os.path.join(crd_dir, crd_file)
-        if not os.path.exists(crd_path):
+        if crd_file not in present:
             log_error(f"CRD file not found: {crd_path}")
-            all_applied = False
-            continue
-        
-        log_info(f"Applying {crd_file}...")
-        
-        # First try apply (for new CRDs)
-        result = run_command(
-            f"kubectl apply -f {crd_path}",
-            check=False,
-            capture_output=True
-        )
-        
-        if result.returncode != 0:
-            # If it failed because CRD already exists or needs update, use replace --force
-            if "already exists" in result.stderr.lower() or "AlreadyExists" in result.stderr or "must be specified for an update" in result.stderr:
-                log_info(f"  {crd_file} already exists, replacing...")
-                # Use replace --force to update existing CRD without resourceVersion
-                result = run_command(
-                    f"kubectl replace --force -f {crd_path}",
-                    check=False,
-                    capture_output=True
-                )
-                
-                if result.returncode != 0:
-                    log_error(f"Failed to replace {crd_file}: {result.stderr}")
-                    all_applied = False
-                else:
-                    log_info(f"  ✅ {crd_file} replaced successfully")
-            else:
-                log_error(f"Failed to install {crd_file}: {result.stderr}")
-                all_applied = False
-        else:
-            log_info(f"  ✅ {crd_file} applied successfully")
-    
-    if not all_applied:
+            return False
+        apply_cmd += ["-f", crd_path]
+    
+    # One server-side apply covers all three CRDs, both creating new ones and
+    # updating existing ones (no resourceVersion or replace --force needed,
+    # and the large schemas stay out of the last-applied annotation)
+    result = run_command(apply_cmd, check=False, capture_output=True)
+    if result.returncode != 0:
+        log_error(f"Failed to apply ArgoCD CRDs: {result.stderr}")
         return False
     
     log_info("✅ ArgoCD CRD manifests applied")
     log_info("Waiting for CRDs to be established...")
     
-    # Wait for all CRDs to be established
-    required_crds = [
-        "applications.argoproj.io",
-        "applicationsets.argoproj.io",
-        "appprojects.argoproj.io"
-    ]
+    # Wait for all CRDs to be established. One kubectl wait watches all of
+    # them and returns as soon as every one reports the condition.
+    result = run_command(
+        ["kubectl", "wait", "--for=condition=established", "--timeout=60s",
+         *(f"crd/{crd}" for crd in ARGOCD_CRDS)],
+        check=False,
+        capture_output=True
+    )
+    if result.returncode == 0:
+        log_info("✅ All ArgoCD CRDs are established!")
+    else:
+        log_warn("Some CRDs not established after 60 seconds, but installation may have succeeded")
     
-    max_attempts = 30  # Wait up to 1 minute
-    for i in range(max_attempts):
-        all_established = True
-        for crd in required_crds:
-            result = run_command(
-                f"kubectl wait --for=condition=established crd {crd} --timeout=10s",
-                check=False,
-                capture_output=True
-            )
-            
-            if result.returncode != 0:
-                all_established = False
-                break
-        
-        if all_established:
-            log_info("✅ All ArgoCD CRDs are established!")
-            break
-        
-        if i < max_attempts - 1:
-            log_info(f"Waiting for CRDs to be established... ({i+1}/{max_attempts})")
-            time.sleep(2)
-        else:
-            log_warn("Some CRDs not established after 60 seconds, but installation may have succeeded")
-    
-    # Verify all CRDs exist
-    all_ready = True
-    for crd in required_crds:
-        result = run_command(
-            f"kubectl get crd {crd}",
-            check=False,
-            capture_output=True
-        )
-        
-        if result.returncode == 0:
-            log_info(f"✅ {crd} is installed and ready")
-        else:
-            log_warn(f"⚠️  {crd} not found - this may cause issues")
-            all_ready = False
-    
-    return all_ready
+    # The apply succeeded, so the CRDs exist; no separate get is needed
+    return True
 
 
 def main():
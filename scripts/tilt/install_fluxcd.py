@@ -14,6 +14,7 @@ We exclude:
 This provides "enough flux" for GitRepository and notification support.
 """
 
+import json
 import subprocess
 import sys
 import tempfile
@@ -21,19 +22,31 @@ import yaml
 from pathlib import Path
 
 
-def run_command(cmd, check=True, capture_output=True, shell=False):
-    """Run a shell command and return the result."""
-    if isinstance(cmd, str) and not shell:
-        cmd = cmd.split()
-    
+FLUX_NAMESPACE = "flux-system"
+FLUX_CONTROLLERS = ["source-controller", "notification-controller"]
+FLUX_CRDS = [
+    "gitrepositories.source.toolkit.fluxcd.io",
+    "alerts.notification.toolkit.fluxcd.io",
+    "providers.notification.toolkit.fluxcd.io",
+]
+# Appends --watch-all-namespaces=true to the source-controller args; passed
+# to kubectl as a single argv element, so it needs no shell quoting
+WATCH_ALL_NAMESPACES_PATCH = json.dumps([{
+    "op": "add",
+    "path": "/spec/template/spec/containers/0/args/-",
+    "value": "--watch-all-namespaces=true",
+}])
+
+
+def run_command(cmd, check=True, capture_output=True):
+    """Run a command (an argv list, no shell) and return the result."""
     result = subprocess.run(
         cmd,
-        shell=shell,
         capture_output=capture_output,
         text=True
     )
     if check and result.returncode != 0:
-        print(f"Error: Command failed: {' '.join(cmd) if isinstance(cmd, list) else cmd}", file=sys.stderr)
+        print(f"Error: Command failed: {' '.join(cmd)}", file=sys.stderr)
         if result.stderr:
             print(result.stderr, file=sys.stderr)
         sys.exit(1)
@@ -76,34 +89,48 @@ def check_flux_cli():
     return False
 
 
-def check_fluxcd_installed():
-    """Check if FluxCD source-controller and notification-controller are already installed."""
-    # Check namespace
-    ns_check = run_command(
-        "kubectl get namespace flux-system",
-        check=False,
-        capture_output=True
-    )
-    if ns_check.returncode != 0:
-        return False
+def fetch_cluster_state():
+    """Fetch the Flux namespace, controller deployments and CRDs in one kubectl call.
     
-    # Check if source-controller is running
-    source_check = run_command(
-        "kubectl get pods -n flux-system -l app=source-controller --field-selector=status.phase=Running",
+    Returns a dict keyed by kind, then by name (e.g. state["Deployment"]["source-controller"]).
+    Missing resources are simply absent; an unreachable cluster yields an empty dict.
+    """
+    # Namespace and CRDs are cluster-scoped; kubectl ignores -n for them
+    resources = [f"namespace/{FLUX_NAMESPACE}"]
+    resources += [f"deployment/{name}" for name in FLUX_CONTROLLERS]
+    resources += [f"crd/{name}" for name in FLUX_CRDS]
+    result = run_command(
+        ["kubectl", "get", *resources, "-n", FLUX_NAMESPACE, "-o", "json", "--ignore-not-found"],
         check=False,
         capture_output=True
     )
-    source_running = source_check.returncode == 0 and "source-controller" in source_check.stdout
+    if result.returncode != 0 or not result.stdout.strip():
+        return {}
     
-    # Check if notification-controller is running
-    notification_check = run_command(
-        "kubectl get pods -n flux-system -l app=notification-controller --field-selector=status.phase=Running",
-        check=False,
-        capture_output=True
-    )
-    notification_running = notification_check.returncode == 0 and "notification-controller" in notification_check.stdout
+    data = json.loads(result.stdout)
+    items = data.get("items", []) if data.get("kind") == "List" else [data]
+    state = {}
+    for item in items:
+        state.setdefault(item["kind"], {})[item["metadata"]["name"]] = item
+    return state
+
+
+def source_controller_args(state):
+    """Return the source-controller container args, or None if it is not deployed."""
+    deployment = state.get("Deployment", {}).get("source-controller")
+    if not deployment:
+        return None
+    return deployment["spec"]["template"]["spec"]["containers"][0].get("args", [])
+
+
+def check_fluxcd_installed(state):
+    """Check if FluxCD source-controller and notification-controller are already installed."""
+    if FLUX_NAMESPACE not in state.get("Namespace", {}):
+        return False
     
-    if source_running and notification_running:
+    # A controller counts as running once its deployment has a ready replica
+    deployments = state.get("Deployment", {})
+    if all(deployments.get(name, {}).get("status", {}).get("readyReplicas", 0) > 0 for name in FLUX_CONTROLLERS):
         log_info("✅ FluxCD source-controller and notification-controller are already installed (running)")
         return True
     
@@ -317,43 +344,31 @@ def install_fluxcd():
         
         log_info("✅ FluxCD manifests applied")
         
-        # Wait for source-controller to be ready
-        log_info("Waiting for source-controller to be ready...")
-        wait_result = run_command(
-            "kubectl wait --for=condition=ready pod -l app=source-controller -n flux-system --timeout=120s",
-            check=False,
-            capture_output=True
-        )
-        
-        if wait_result.returncode == 0:
-            log_info("✅ source-controller is ready!")
-        else:
-            log_warn("⚠️  source-controller not ready after 120 seconds, but installation may have succeeded")
-        
-        # Wait for notification-controller to be ready
-        log_info("Waiting for notification-controller to be ready...")
+        # Wait for both controllers with one kubectl wait: it watches all
+        # matching pods and returns as soon as every one is ready
+        log_info("Waiting for source-controller and notification-controller to be ready...")
         wait_result = run_command(
-            "kubectl wait --for=condition=ready pod -l app=notification-controller -n flux-system --timeout=120s",
+            ["kubectl", "wait", "--for=condition=ready", "pod",
+             "-l", "app in (source-controller,notification-controller)",
+             "-n", "flux-system", "--timeout=120s"],
             check=False,
             capture_output=True
         )
         
         if wait_result.returncode == 0:
-            log_info("✅ notification-controller is ready!")
+            log_info("✅ source-controller and notification-controller are ready!")
         else:
-            log_warn("⚠️  notification-controller not ready after 120 seconds, but installation may have succeeded")
+            log_warn("⚠️  Controllers not ready after 120 seconds, but installation may have succeeded")
         
         # Configure source-controller to watch all namespaces
         log_info("Configuring source-controller to watch all namespaces...")
-        result = run_command(
-            "kubectl get deployment source-controller -n flux-system -o jsonpath='{.spec.template.spec.containers[0].args}'",
-            check=False,
-            capture_output=True
-        )
+        state = fetch_cluster_state()
+        args = source_controller_args(state)
         
-        if result.returncode == 0 and "--watch-all-namespaces=true" not in result.stdout:
+        if args is not None and "--watch-all-namespaces=true" not in args:
             patch_result = run_command(
-                "kubectl patch deployment source-controller -n flux-system --type='json' -p='[{\"op\": \"add\", \"path\": \"/spec/template/spec/containers/0/args/-\", \"value\": \"--watch-all-namespaces=true\"}]'",
+                ["kubectl", "patch", "deployment", "source-controller", "-n", FLUX_NAMESPACE,
+                 "--type=json", "-p", WATCH_ALL_NAMESPACES_PATCH],
                 check=False,
                 capture_output=True
             )
@@ -361,40 +376,27 @@ def install_fluxcd():
             if patch_result.returncode == 0:
                 log_info("✅ Configured source-controller to watch all namespaces")
                 log_info("Waiting for source-controller to restart...")
-                import time
-                time.sleep(5)
-                
-                # Wait for the new pod to be ready
-                for i in range(30):
-                    result = run_command(
-                        "kubectl wait --for=condition=ready pod -l app=source-controller -n flux-system --timeout=10s",
-                        check=False,
-                        capture_output=True
-                    )
-                    if result.returncode == 0:
-                        log_info("✅ source-controller restarted and ready with multi-namespace support")
-                        break
-                    time.sleep(2)
+                # rollout status follows the new ReplicaSet, so it neither
+                # returns early on the old pod nor needs a sleep/poll loop
+                result = run_command(
+                    ["kubectl", "rollout", "status", "deployment/source-controller",
+                     "-n", "flux-system", "--timeout=120s"],
+                    check=False,
+                    capture_output=True
+                )
+                if result.returncode == 0:
+                    log_info("✅ source-controller restarted and ready with multi-namespace support")
+                else:
+                    log_warn("⚠️  source-controller restart not complete after 120 seconds")
             else:
                 log_warn(f"⚠️  Failed to configure source-controller: {patch_result.stderr}")
-        else:
-            if result.returncode == 0 and "--watch-all-namespaces=true" in result.stdout:
-                log_info("✅ source-controller already configured to watch all namespaces")
-        
-        # Verify CRDs exist
-        crds_to_check = [
-            "gitrepositories.source.toolkit.fluxcd.io",
-            "alerts.notification.toolkit.fluxcd.io",
-            "providers.notification.toolkit.fluxcd.io",
-        ]
+        elif args is not None:
+            log_info("✅ source-controller already configured to watch all namespaces")
         
-        for crd in crds_to_check:
-            result = run_command(
-                f"kubectl get crd {crd}",
-                check=False,
-                capture_output=True
-            )
-            if result.returncode == 0:
+        # Verify CRDs exist (from the state fetched above; the patch does not touch them)
+        installed_crds = state.get("CustomResourceDefinition", {})
+        for crd in FLUX_CRDS:
+            if crd in installed_crds:
                 log_info(f"✅ CRD {crd} is installed")
             else:
                 log_warn(f"⚠️  CRD {crd} not found")
@@ -417,20 +419,18 @@ def main():
     log_info("")
     
     # Check if already installed
-    is_installed = check_fluxcd_installed()
+    state = fetch_cluster_state()
+    is_installed = check_fluxcd_installed(state)
     
     if is_installed:
         log_info("FluxCD is already installed. Verifying configuration...")
         # Still configure multi-namespace support if needed
-        result = run_command(
-            "kubectl get deployment source-controller -n flux-system -o jsonpath='{.spec.template.spec.containers[0].args}'",
-            check=False,
-            capture_output=True
-        )
-        if result.returncode == 0 and "--watch-all-namespaces=true" not in result.stdout:
+        args = source_controller_args(state)
+        if args is not None and "--watch-all-namespaces=true" not in args:
             log_info("Configuring source-controller for multi-namespace support...")
             patch_result = run_command(
-                "kubectl patch deployment source-controller -n flux-system --type='json' -p='[{\"op\": \"add\", \"path\": \"/spec/template/spec/containers/0/args/-\", \"value\": \"--watch-all-namespaces=true\"}]'",
+                ["kubectl", "patch", "deployment", "source-controller", "-n", FLUX_NAMESPACE,
+                 "--type=json", "-p", WATCH_ALL_NAMESPACES_PATCH],
                 check=False,
                 capture_output=True
             )
@@ -438,9 +438,8 @@ def main():
                 log_info("✅ Configured source-controller to watch all namespaces")
             else:
                 log_warn(f"⚠️  Failed to configure: {patch_result.stderr}")
-        else:
-            if result.returncode == 0 and "--watch-all-namespaces=true" in result.stdout:
-                log_info("✅ source-controller already configured for multi-namespace")
+        elif args is not None:
+            log_info("✅ source-controller already configured for multi-namespace")
         log_info("")
         log_info("✅ FluxCD installation check complete!")
         return
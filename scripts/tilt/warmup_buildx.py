@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Warm up the shared buildx builder.
+
+Creates the tilt-builder docker-container builder if needed and boots its
+BuildKit container, so the first image build after `tilt up` does not pay
+the container start-up. The builder is named, so it survives Tilt restarts.
+"""
+
+import sys
+
+from _build_common import (
+    BUILDX_BUILDER,
+    ensure_buildx_builder,
+    is_missing_builder,
+    reset_buildx_builder,
+    run_command,
+)
+
+
+def bootstrap():
+    """Boot the builder's BuildKit container; returns the inspect result."""
+    return run_command(["docker", "buildx", "inspect", "--bootstrap", BUILDX_BUILDER], check=False)
+
+
+def main():
+    """Create and bootstrap the buildx builder."""
+    if not ensure_buildx_builder():
+        # Builds fall back to plain `docker build`; nothing to warm up
+        print("⚠️  docker buildx not available, skipping warmup")
+        return
+
+    print(f"🔥 Bootstrapping buildx builder: {BUILDX_BUILDER}")
+    result = bootstrap()
+    if result.returncode != 0 and is_missing_builder(result.stderr):
+        # The sentinel outlived the builder; recreate it once
+        print(f"🔁 buildx builder {BUILDX_BUILDER} is gone, recreating it")
+        reset_buildx_builder()
+        if ensure_buildx_builder():
+            result = bootstrap()
+    if result.returncode != 0:
+        print(f"⚠️  Warning: Failed to bootstrap {BUILDX_BUILDER}", file=sys.stderr)
+        if result.stderr:
+            print(result.stderr, file=sys.stderr)
+        return
+
+    print(f"✅ buildx builder ready: {BUILDX_BUILDER}")
+
+
+if __name__ == "__main__":
+    main()